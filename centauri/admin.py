@@ -6,6 +6,8 @@ from centauri.models import (
     ShowSession,
     Reservation,
     Ticket,
+    SeatHold,
+    HeldSeat,
 )
 
 
@@ -19,8 +21,22 @@ class ReservationAdmin(admin.ModelAdmin):
     inlines = (TicketInline,)
 
 
+class HeldSeatInline(admin.TabularInline):
+    model = HeldSeat
+    extra = 1
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    inlines = (HeldSeatInline,)
+
+
+@admin.register(ShowSession)
+class ShowSessionAdmin(admin.ModelAdmin):
+    readonly_fields = ("sold_places",)
+
+
 admin.site.register(ShowTheme)
 admin.site.register(AstronomyShow)
 admin.site.register(PlanetariumDome)
-admin.site.register(ShowSession)
 admin.site.register(Ticket)
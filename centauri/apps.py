@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CentauriConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "centauri"
+
+    def ready(self):
+        import centauri.signals  # noqa: F401
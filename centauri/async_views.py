@@ -0,0 +1,326 @@
+import asyncio
+import weakref
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import DatabaseError, close_old_connections, connections
+from django.utils.http import parse_etags
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from centauri.cache import CatalogCacheMixin
+from centauri.models import (
+    SHOW_SESSION_ETAG_FIELDS,
+    SHOW_SESSION_ETAG_VALUES,
+    ShowSession,
+)
+from centauri.pagination import ShowSessionPagination
+from centauri.serializers import (
+    ASTRONOMY_SHOW_LIST_VALUES,
+    SHOW_SESSION_LIST_VALUES,
+    AstronomyShowListSerializer,
+    ShowSessionListSerializer,
+    ShowSessionRetrieveSerializer,
+    ShowSessionSeatMapSerializer,
+)
+from centauri.values_serializers import FastJSONRenderer
+from centauri.views import AstronomyShowViewSet, ShowSessionViewSet
+
+LONG_POLL_MAX_WAIT = 30
+LONG_POLL_INTERVAL = 1.0
+
+WAIT_PARAMETER = OpenApiParameter(
+    name="wait",
+    type=OpenApiTypes.INT,
+    description="With a matching If-None-Match, wait up to this many "
+                f"seconds (at most {LONG_POLL_MAX_WAIT}) for the show "
+                "session to change before answering 304 (ex. ?wait=25)",
+)
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView with async handlers. Authentication, permissions and
+    throttles run in a thread, handlers await the async ORM
+    """
+
+    renderer_classes = (FastJSONRenderer,)
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self,
+                    request.method.lower(),
+                    self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(
+                    request, *args, **kwargs
+                )
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            self._paginator = (
+                None if self.pagination_class is None
+                else self.pagination_class()
+            )
+        return self._paginator
+
+    async def alist_values(self, queryset, values_serializer) -> Response:
+        """Paginated response of values() rows of queryset"""
+        rows = values_serializer.get_rows(queryset)
+        page = None
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(
+                rows, self.request, view=self
+            )
+        if page is None:
+            return Response(await values_serializer.ato_representation(
+                [row async for row in rows]
+            ))
+
+        return self.paginator.get_paginated_response(
+            await values_serializer.ato_representation(page)
+        )
+
+
+class ShowSessionVersionWatcher:
+    """
+    Wake waiters when versions of their show sessions change, versions
+    of every watched session are polled with one query per interval
+    """
+
+    def __init__(self):
+        self.waiters = defaultdict(list)
+        self.task = None
+
+    @staticmethod
+    def fetch_versions(show_session_ids) -> dict[int, int]:
+        try:
+            return dict(
+                ShowSession.objects
+                .filter(id__in=show_session_ids)
+                .values_list("id", "version")
+            )
+        finally:
+            close_old_connections()
+
+    async def poll(self) -> None:
+        while self.waiters:
+            await asyncio.sleep(LONG_POLL_INTERVAL)
+            try:
+                # Not thread sensitive, requests never wait for polls
+                versions = await sync_to_async(
+                    self.fetch_versions, thread_sensitive=False
+                )(list(self.waiters))
+            except DatabaseError:
+                continue
+
+            for show_session_id, waiters in self.waiters.items():
+                current_version = versions.get(show_session_id)
+                for version, future in waiters:
+                    if current_version != version and not future.done():
+                        future.set_result(current_version)
+
+    async def wait_for_change(
+            self,
+            show_session_id: int,
+            version: int,
+            timeout: float,
+    ) -> int | None:
+        """
+        New version of the show session, None once it is deleted and
+        the same version if it did not change within timeout
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiter = (version, future)
+        self.waiters[show_session_id].append(waiter)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.poll())
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return version
+        finally:
+            self.waiters[show_session_id].remove(waiter)
+            if not self.waiters[show_session_id]:
+                del self.waiters[show_session_id]
+
+
+_version_watchers = weakref.WeakKeyDictionary()
+
+
+def get_version_watcher() -> ShowSessionVersionWatcher:
+    """Version watcher of the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _version_watchers:
+        _version_watchers[loop] = ShowSessionVersionWatcher()
+    return _version_watchers[loop]
+
+
+class ShowSessionLongPollView(AsyncAPIView):
+    """
+    Show session with the ETag of ShowSessionViewSet. A matching
+    If-None-Match is answered with 304 Not Modified, after waiting
+    up to ?wait= seconds for the session to change
+    """
+
+    queryset = ShowSession.objects.all()
+    serializer_class = None
+
+    async def aget_serializer_context(self, show_session) -> dict:
+        return {}
+
+    def get_wait(self) -> int:
+        try:
+            wait = int(self.request.query_params.get("wait", 0))
+        except ValueError:
+            wait = -1
+        if not 0 <= wait <= LONG_POLL_MAX_WAIT:
+            raise ValidationError({
+                "wait": f"Wait must be from 0 to {LONG_POLL_MAX_WAIT} "
+                        f"seconds."
+            })
+        return wait
+
+    async def get(self, request, pk):
+        wait = self.get_wait()
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            values = await (
+                ShowSession.objects
+                .filter(pk=pk)
+                .annotate(**SHOW_SESSION_ETAG_VALUES)
+                .values(*SHOW_SESSION_ETAG_FIELDS)
+                .afirst()
+            )
+            if values is None:
+                raise NotFound()
+
+            version = values["version"]
+            etag = ShowSessionViewSet.get_etag(values)
+            if etag in parse_etags(if_none_match) or if_none_match == "*":
+                current_version = version
+                if wait:
+                    # Waiting requests hold no database connection
+                    await sync_to_async(connections.close_all)()
+                    current_version = (
+                        await get_version_watcher().wait_for_change(
+                            pk, version, wait
+                        )
+                    )
+                if current_version == version:
+                    return Response(
+                        status=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag},
+                    )
+
+        try:
+            show_session = await (
+                self.queryset
+                .annotate(**SHOW_SESSION_ETAG_VALUES)
+                .aget(pk=pk)
+            )
+        except ShowSession.DoesNotExist:
+            raise NotFound()
+
+        serializer = self.serializer_class(
+            show_session,
+            context=await self.aget_serializer_context(show_session),
+        )
+        return Response(
+            serializer.data,
+            headers={
+                "ETag": ShowSessionViewSet.get_object_etag(show_session)
+            },
+        )
+
+
+class AsyncShowSessionListView(AsyncAPIView):
+    pagination_class = ShowSessionPagination
+
+    @extend_schema(responses=ShowSessionListSerializer(many=True))
+    async def get(self, request):
+        """Show sessions filtered like the show session list"""
+        viewset = ShowSessionViewSet(request=request, action="list")
+        return await self.alist_values(
+            viewset.get_queryset(), SHOW_SESSION_LIST_VALUES
+        )
+
+
+class AsyncShowSessionDetailView(ShowSessionLongPollView):
+    queryset = (
+        ShowSession.objects
+        .select_related("astronomy_show", "planetarium_dome")
+        .prefetch_related("tickets", "astronomy_show__show_themes")
+    )
+    serializer_class = ShowSessionRetrieveSerializer
+
+    @extend_schema(
+        parameters=[WAIT_PARAMETER],
+        responses=ShowSessionRetrieveSerializer,
+    )
+    async def get(self, request, pk):
+        """Show session with taken places"""
+        return await super().get(request, pk)
+
+
+class AsyncShowSessionSeatMapView(ShowSessionLongPollView):
+    queryset = ShowSession.objects.select_related("planetarium_dome")
+    serializer_class = ShowSessionSeatMapSerializer
+
+    async def aget_serializer_context(self, show_session) -> dict:
+        return {"seat_map": await show_session.aseat_map()}
+
+    @extend_schema(
+        parameters=[WAIT_PARAMETER],
+        responses=ShowSessionSeatMapSerializer,
+    )
+    async def get(self, request, pk):
+        """Taken places as the bitmap of the seat_map action"""
+        return await super().get(request, pk)
+
+
+class AsyncAstronomyShowListView(CatalogCacheMixin, AsyncAPIView):
+    cache_dependencies = AstronomyShowViewSet.cache_dependencies
+
+    @extend_schema(responses=AstronomyShowListSerializer(many=True))
+    async def get(self, request):
+        """Astronomy shows filtered like the astronomy show list"""
+        return await self.acached_response(self.alist, request)
+
+    async def alist(self, request):
+        viewset = AstronomyShowViewSet(request=request, action="list")
+        return await self.alist_values(
+            viewset.get_queryset(), ASTRONOMY_SHOW_LIST_VALUES
+        )
@@ -0,0 +1,113 @@
+import hashlib
+
+from django.core.cache import caches
+from rest_framework.response import Response
+
+CATALOG_CACHE = "catalog"
+STATS_KEYS = {"hits": "catalog:stats:hits", "misses": "catalog:stats:misses"}
+
+
+def _increment(key: str) -> None:
+    cache = caches[CATALOG_CACHE]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+async def _aincrement(key: str) -> None:
+    cache = caches[CATALOG_CACHE]
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout=None)
+
+
+def _version_key(model) -> str:
+    return f"catalog:version:{model._meta.label_lower}"
+
+
+def invalidate_catalog_cache(model) -> None:
+    """Make every cached response that depends on model stale"""
+    _increment(_version_key(model))
+
+
+def get_catalog_versions(models) -> str:
+    """Current versions of models joined in one stamp"""
+    version_keys = [_version_key(model) for model in models]
+    versions = caches[CATALOG_CACHE].get_many(version_keys)
+    return ".".join(str(versions.get(key, 0)) for key in version_keys)
+
+
+async def aget_catalog_versions(models) -> str:
+    version_keys = [_version_key(model) for model in models]
+    versions = await caches[CATALOG_CACHE].aget_many(version_keys)
+    return ".".join(str(versions.get(key, 0)) for key in version_keys)
+
+
+def get_catalog_cache_stats() -> dict[str, int]:
+    counters = caches[CATALOG_CACHE].get_many(STATS_KEYS.values())
+    return {
+        name: counters.get(key, 0)
+        for name, key in STATS_KEYS.items()
+    }
+
+
+class CatalogCacheMixin:
+    """
+    Cache list and retrieve response data per query string in the catalog
+    cache, entries are keyed by versions of cache_dependencies models
+    """
+
+    cache_dependencies = ()
+
+    @staticmethod
+    def format_cache_key(request, catalog_versions: str) -> str:
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f"catalog:response:{catalog_versions}:{path}"
+
+    def get_cache_key(self, request) -> str:
+        return self.format_cache_key(
+            request, get_catalog_versions(self.cache_dependencies)
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = caches[CATALOG_CACHE]
+        cache_key = self.get_cache_key(request)
+        data = cache.get(cache_key)
+        if data is not None:
+            _increment(STATS_KEYS["hits"])
+            return Response(data)
+
+        _increment(STATS_KEYS["misses"])
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(cache_key, response.data)
+        return response
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        cache = caches[CATALOG_CACHE]
+        cache_key = self.format_cache_key(
+            request, await aget_catalog_versions(self.cache_dependencies)
+        )
+        data = await cache.aget(cache_key)
+        if data is not None:
+            await _aincrement(STATS_KEYS["hits"])
+            return Response(data)
+
+        await _aincrement(STATS_KEYS["misses"])
+        response = await handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(cache_key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,122 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from functools import partial
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+TICKET_EXPORT_COLUMNS = {
+    "reservation": "reservation_id",
+    "reserved_at": "reservation__created_at",
+    "user": "reservation__user__email",
+    "ticket": "id",
+    "show_session": "show_session_id",
+    "show_time": "show_session__show_time",
+    "astronomy_show": "show_session__astronomy_show__title",
+    "planetarium_dome": "show_session__planetarium_dome__name",
+    "row": "row",
+    "seat": "seat",
+}
+
+
+class ExportRenderer(ABC, BaseRenderer):
+    """
+    Negotiates the export format, rows are streamed by export_tickets()
+    and only error responses are rendered
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+    def header(self, columns) -> str:
+        return ""
+
+    @abstractmethod
+    def format_rows(self, columns, rows) -> str:
+        """Rows of one batch in the export format"""
+
+    def stream(self, columns, rows):
+        yield self.header(columns)
+        while batch := list(islice(rows, EXPORT_CHUNK_SIZE)):
+            yield self.format_rows(columns, batch)
+
+
+class Echo:
+    """File-like object that returns what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def header(self, columns) -> str:
+        return csv.writer(Echo()).writerow(columns)
+
+    def format_rows(self, columns, rows) -> str:
+        writer = csv.writer(Echo())
+        return "".join(writer.writerow(row) for row in rows)
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def format_rows(self, columns, rows) -> str:
+        return "".join(
+            json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+            for row in rows
+        )
+
+
+EXPORT_RENDERERS = (CSVExportRenderer, NDJSONExportRenderer)
+
+
+async def aiterate_in_thread(iterator):
+    """
+    Iterate a synchronous iterator one item per sync_to_async() call,
+    ASGI servers buffer synchronous streaming content in full
+    """
+    next_item = partial(next, iterator, None)
+    try:
+        while (item := await sync_to_async(next_item)()) is not None:
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            await sync_to_async(iterator.close)()
+
+
+def export_tickets(request, tickets, filename: str) -> StreamingHttpResponse:
+    """
+    Stream tickets with their reservations and sessions in the format
+    negotiated by one of EXPORT_RENDERERS
+    """
+    renderer = request.accepted_renderer
+    rows = (
+        tickets
+        .order_by("id")
+        .values_list(*TICKET_EXPORT_COLUMNS.values())
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    content = renderer.stream(list(TICKET_EXPORT_COLUMNS), rows)
+    # ASGIRequest keeps the connection scope, DRF requests proxy it
+    if hasattr(request, "scope"):
+        content = aiterate_in_thread(content)
+    response = StreamingHttpResponse(
+        content,
+        content_type=f"{renderer.media_type}; charset={renderer.charset}",
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{renderer.format}"'
+    )
+    return response
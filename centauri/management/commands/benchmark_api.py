@@ -0,0 +1,642 @@
+import argparse
+import base64
+import io
+import json
+import random
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from itertools import islice
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from PIL import Image
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from centauri.models import (
+    ShowTheme,
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    SeatHold,
+    HeldSeat,
+    Ticket,
+)
+from user.serializers import UserClaimsTokenObtainPairSerializer
+
+BATCH_SIZE = 10_000
+TICKETS_PER_RESERVATION = 4
+BENCHMARK_PASSWORD = "benchmark-password"
+# Requests from outside INTERNAL_IPS, so the debug toolbar stays idle
+REMOTE_ADDR = "192.0.2.1"
+# The deep page starts after this many of the latest sessions
+DEEP_PAGE_OFFSET = 10
+# Requests booking, holding and cancelling seats of the least booked session
+SEAT_REQUESTS_PER_NUMBER = 4
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def percentile(sorted_values: list[float], percent: int) -> float:
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a benchmark dataset in a separate test database and report "
+        "latency, SQL queries and response size of every API endpoint, "
+        "except reservation updates, tickets are not writable through them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--themes", type=positive_int, default=20)
+        parser.add_argument("--shows", type=positive_int, default=50)
+        parser.add_argument("--domes", type=positive_int, default=5)
+        parser.add_argument("--rows", type=positive_int, default=30)
+        parser.add_argument("--seats-in-row", type=positive_int, default=40)
+        parser.add_argument(
+            "--sessions",
+            type=positive_int,
+            default=2_000,
+            help=f"At least {DEEP_PAGE_OFFSET + 1}, the deep page needs them",
+        )
+        parser.add_argument("--tickets", type=int, default=1_000_000)
+        parser.add_argument(
+            "--requests",
+            type=positive_int,
+            default=50,
+            help="Measured requests per endpoint",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Unmeasured requests per endpoint",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Previous JSON report to print p50 and query deltas against",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database and its data between runs",
+        )
+
+    def handle(self, *args, **options):
+        if options["sessions"] <= DEEP_PAGE_OFFSET:
+            raise CommandError(
+                f"--sessions must be greater than {DEEP_PAGE_OFFSET}"
+            )
+        if options["warmup"] < 0:
+            raise CommandError("--warmup must not be negative")
+        random.seed(options["seed"])
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+            keepdb=options["keepdb"],
+        )
+        try:
+            if not (options["keepdb"] and ShowSession.objects.exists()):
+                self.seed(options)
+            # Repeated requests must reach the endpoints instead of 429s,
+            # uploaded posters must not end up in the media of the project
+            with (
+                patch.object(APIView, "throttle_classes", ()),
+                tempfile.TemporaryDirectory() as media_root,
+                override_settings(MEDIA_ROOT=media_root),
+            ):
+                results = self.run_endpoints(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=0,
+                keepdb=options["keepdb"],
+            )
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "commit": self.git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "dataset": {
+                    key: options[key]
+                    for key in (
+                        "themes",
+                        "shows",
+                        "domes",
+                        "rows",
+                        "seats_in_row",
+                        "sessions",
+                        "tickets",
+                    )
+                },
+                "requests": options["requests"],
+            },
+            "results": results,
+        }
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                self.print_comparison(json.load(baseline), report)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def git_commit() -> str | None:
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def seed(self, options):
+        started = time.perf_counter()
+        user_model = get_user_model()
+        self.users = [
+            user_model.objects.create_user(
+                email=f"user{index}@benchmark.test",
+                password=BENCHMARK_PASSWORD,
+            )
+            for index in range(10)
+        ]
+        user_model.objects.create_superuser(
+            email="admin@benchmark.test",
+            password=BENCHMARK_PASSWORD,
+        )
+
+        themes = ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"Theme {index}")
+            for index in range(options["themes"])
+        )
+        shows = AstronomyShow.objects.bulk_create(
+            AstronomyShow(
+                title=f"Astronomy show {index}",
+                description=f"Description of astronomy show {index}",
+            )
+            for index in range(options["shows"])
+        )
+        AstronomyShow.show_themes.through.objects.bulk_create(
+            AstronomyShow.show_themes.through(
+                astronomyshow_id=show.id,
+                showtheme_id=theme.id,
+            )
+            for show in shows
+            for theme in random.sample(themes, min(3, len(themes)))
+        )
+        domes = PlanetariumDome.objects.bulk_create(
+            PlanetariumDome(
+                name=f"Dome {index}",
+                rows=options["rows"],
+                seats_in_row=options["seats_in_row"],
+            )
+            for index in range(options["domes"])
+        )
+
+        # Half of the sessions are in the past, half are upcoming
+        first_show_time = timezone.now() - timedelta(
+            hours=options["sessions"] // len(domes) // 2
+        )
+        sessions = []
+        for batch in batched(range(options["sessions"]), BATCH_SIZE):
+            sessions += ShowSession.objects.bulk_create(
+                ShowSession(
+                    astronomy_show=random.choice(shows),
+                    planetarium_dome=domes[index % len(domes)],
+                    show_time=first_show_time + timedelta(
+                        hours=index // len(domes)
+                    ),
+                )
+                for index in batch
+            )
+
+        capacity = options["rows"] * options["seats_in_row"]
+        tickets_per_session = min(
+            capacity,
+            -(-options["tickets"] // max(len(sessions), 1)),
+        )
+        places = (
+            (session.id, index // options["seats_in_row"] + 1,
+             index % options["seats_in_row"] + 1)
+            for session in sessions
+            for index in range(tickets_per_session)
+        )
+        places = islice(places, options["tickets"])
+        for batch in batched(places, BATCH_SIZE):
+            reservations = Reservation.objects.bulk_create(
+                Reservation(user=random.choice(self.users))
+                for _ in range(-(-len(batch) // TICKETS_PER_RESERVATION))
+            )
+            Ticket.objects.bulk_create(
+                Ticket(
+                    show_session_id=show_session_id,
+                    row=row,
+                    seat=seat,
+                    reservation=reservations[
+                        index // TICKETS_PER_RESERVATION
+                    ],
+                )
+                for index, (show_session_id, row, seat) in enumerate(batch)
+            )
+        call_command("recount_sold_places", stdout=self.stderr)
+
+        self.stderr.write(
+            f"Seeded {Ticket.objects.count()} tickets in "
+            f"{len(sessions)} sessions in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+
+    def endpoints(self, options):
+        """
+        Return (name, method, url, payload factory, user) of every endpoint,
+        the payload factory gets the request number, so does the url of
+        endpoints removing a different object on every request
+        """
+        request_count = options["warmup"] + options["requests"]
+        reservation = Reservation.objects.select_related("user").first()
+        user = (
+            reservation.user if reservation
+            else get_user_model().objects.filter(is_staff=False).first()
+        )
+        admin = get_user_model().objects.get(email="admin@benchmark.test")
+        theme = ShowTheme.objects.first()
+        dome = PlanetariumDome.objects.first()
+        show = AstronomyShow.objects.first()
+        session = ShowSession.objects.order_by("-sold_places").first()
+        booking_session, allocation_session = (
+            ShowSession.objects
+            .select_related("planetarium_dome")
+            .order_by("sold_places")[:2]
+        )
+        free_places = (
+            booking_session.planetarium_dome.capacity
+            - booking_session.sold_places
+        )
+        if free_places < SEAT_REQUESTS_PER_NUMBER * request_count:
+            raise CommandError(
+                f"The least booked session has {free_places} free places, "
+                "lower --tickets or --requests"
+            )
+        latest_show_times = ShowSession.objects.order_by(
+            "-show_time"
+        ).values_list("show_time", flat=True)
+        last_show_time = latest_show_times[DEEP_PAGE_OFFSET]
+        deep_cursor = base64.b64encode(
+            urlencode({"p": str(last_show_time)}).encode()
+        ).decode()
+        refresh_token = str(
+            UserClaimsTokenObtainPairSerializer.get_token(user)
+        )
+        run_id = uuid.uuid4().hex[:8]
+
+        def free_seat(number):
+            # Walk the least booked session from its last seat backwards
+            planetarium_dome = booking_session.planetarium_dome
+            index = planetarium_dome.capacity - 1 - number
+            return {
+                "row": index // planetarium_dome.seats_in_row + 1,
+                "seat": index % planetarium_dome.seats_in_row + 1,
+                "show_session": booking_session.id,
+            }
+
+        def new_show_time(number):
+            # Sessions after the latest one never clash with the schedule
+            return latest_show_times[0] + timedelta(days=1, hours=number)
+
+        # Every removing request needs its own object, catalog objects are
+        # created for the run, so requests never change the seeded ones
+        updated_theme, *removed_themes = ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"Theme {run_id}-{number}")
+            for number in range(request_count + 1)
+        )
+        updated_dome, *removed_domes = PlanetariumDome.objects.bulk_create(
+            PlanetariumDome(
+                name=f"Dome {run_id}-{number}",
+                rows=options["rows"],
+                seats_in_row=options["seats_in_row"],
+            )
+            for number in range(request_count + 1)
+        )
+        updated_show, *removed_shows = AstronomyShow.objects.bulk_create(
+            AstronomyShow(title=f"Astronomy show {run_id}-{number}")
+            for number in range(request_count + 1)
+        )
+        updated_session, *removed_sessions = ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=new_show_time(request_count + number),
+            )
+            for number in range(request_count + 1)
+        )
+        removed_holds = SeatHold.objects.bulk_create(
+            SeatHold(
+                show_session=booking_session,
+                user=admin,
+                expires_at=timezone.now() + timedelta(days=1),
+            )
+            for _ in range(request_count)
+        )
+        HeldSeat.objects.bulk_create(
+            HeldSeat(
+                hold=hold,
+                show_session=booking_session,
+                row=seat["row"],
+                seat=seat["seat"],
+            )
+            for hold, seat in zip(
+                removed_holds,
+                map(free_seat, range(2 * request_count, 3 * request_count)),
+            )
+        )
+        removed_reservations = Reservation.objects.bulk_create(
+            Reservation(user=admin) for _ in range(request_count)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                reservation=removed_reservation,
+                show_session=booking_session,
+                row=seat["row"],
+                seat=seat["seat"],
+            )
+            for removed_reservation, seat in zip(
+                removed_reservations,
+                map(free_seat, range(3 * request_count, 4 * request_count)),
+            )
+        )
+        ShowSession.update_sold_places({booking_session.id: request_count})
+
+        poster = io.BytesIO()
+        Image.new("RGB", (600, 900), "navy").save(poster, format="PNG")
+
+        def detail(basename, pk, action="detail"):
+            return reverse(f"centauri:{basename}-{action}", args=(pk,))
+
+        def centauri_list(basename):
+            return reverse(f"centauri:{basename}-list")
+
+        return [
+            ("show_themes list", "get",
+             centauri_list("showtheme"), None, user),
+            ("show_themes retrieve", "get",
+             detail("showtheme", theme.id), None, user),
+            ("planetarium_domes list", "get",
+             centauri_list("planetariumdome"), None, user),
+            ("planetarium_domes retrieve", "get",
+             detail("planetariumdome", dome.id), None, user),
+            ("astronomy_shows list", "get",
+             centauri_list("astronomyshow"), None, user),
+            ("astronomy_shows list show_themes", "get",
+             centauri_list("astronomyshow") + "?show_themes=theme", None,
+             user),
+            ("astronomy_shows retrieve", "get",
+             detail("astronomyshow", show.id), None, user),
+            ("astronomy_shows upload_poster", "post",
+             detail("astronomyshow", show.id, "upload-poster"),
+             lambda number: {
+                 "poster": SimpleUploadedFile(
+                     "poster.png", poster.getvalue(), "image/png"
+                 ),
+             }, admin),
+            ("show_themes create", "post",
+             centauri_list("showtheme"),
+             lambda number: {"name": f"New theme {run_id}-{number}"}, admin),
+            ("show_themes update", "patch",
+             detail("showtheme", updated_theme.id),
+             lambda number: {"name": f"Updated theme {run_id}-{number}"},
+             admin),
+            ("show_themes destroy", "delete",
+             lambda number: detail("showtheme", removed_themes[number].id),
+             None, admin),
+            ("planetarium_domes create", "post",
+             centauri_list("planetariumdome"),
+             lambda number: {
+                 "name": f"New dome {run_id}-{number}",
+                 "rows": options["rows"],
+                 "seats_in_row": options["seats_in_row"],
+             }, admin),
+            ("planetarium_domes update", "patch",
+             detail("planetariumdome", updated_dome.id),
+             lambda number: {"name": f"Updated dome {run_id}-{number}"},
+             admin),
+            ("planetarium_domes destroy", "delete",
+             lambda number: detail(
+                 "planetariumdome", removed_domes[number].id
+             ),
+             None, admin),
+            ("astronomy_shows create", "post",
+             centauri_list("astronomyshow"),
+             lambda number: {
+                 "title": f"New astronomy show {run_id}-{number}",
+                 "show_themes": [theme.id],
+             }, admin),
+            ("astronomy_shows update", "patch",
+             detail("astronomyshow", updated_show.id),
+             lambda number: {
+                 "description": f"Updated description {number}",
+                 "show_themes": [theme.id],
+             }, admin),
+            ("astronomy_shows destroy", "delete",
+             lambda number: detail(
+                 "astronomyshow", removed_shows[number].id
+             ),
+             None, admin),
+            ("show_sessions list", "get",
+             centauri_list("showsession"), None, user),
+            ("show_sessions list deep page", "get",
+             centauri_list("showsession") + f"?cursor={deep_cursor}",
+             None, user),
+            ("show_sessions retrieve", "get",
+             detail("showsession", session.id), None, user),
+            ("show_sessions create", "post",
+             centauri_list("showsession"),
+             lambda number: {
+                 "astronomy_show": show.id,
+                 "planetarium_dome": dome.id,
+                 "show_time": new_show_time(number).isoformat(),
+             }, admin),
+            ("show_sessions update", "patch",
+             detail("showsession", updated_session.id),
+             lambda number: {"astronomy_show": show.id}, admin),
+            ("show_sessions destroy", "delete",
+             lambda number: detail("showsession", removed_sessions[number].id),
+             None, admin),
+            ("show_sessions seat_map", "get",
+             detail("showsession", session.id, "seat-map"), None, user),
+            ("show_sessions allocate_seats", "post",
+             detail("showsession", allocation_session.id, "allocate-seats"),
+             lambda number: {"seats": 2}, admin),
+            ("reservations list", "get",
+             centauri_list("reservation"), None, user),
+            ("reservations retrieve", "get",
+             detail("reservation", reservation.id) if reservation else None,
+             None, user),
+            ("reservations create", "post",
+             centauri_list("reservation"),
+             lambda number: {"tickets": [free_seat(number)]}, admin),
+            ("reservations destroy", "delete",
+             lambda number: detail(
+                 "reservation", removed_reservations[number].id
+             ),
+             None, admin),
+            ("seat_holds list", "get",
+             centauri_list("seathold"), None, admin),
+            ("seat_holds create", "post",
+             centauri_list("seathold"),
+             lambda number: {
+                 "show_session": booking_session.id,
+                 "seats": [free_seat(request_count + number)],
+             }, admin),
+            ("seat_holds destroy", "delete",
+             lambda number: detail("seathold", removed_holds[number].id),
+             None, admin),
+            ("user register", "post",
+             reverse("user:create"),
+             lambda number: {
+                 "email": f"new-{run_id}-{number}@benchmark.test",
+                 "password": BENCHMARK_PASSWORD,
+             }, None),
+            ("user token", "post",
+             reverse("user:token_obtain_pair"),
+             lambda number: {
+                 "email": user.email,
+                 "password": BENCHMARK_PASSWORD,
+             }, None),
+            ("user token refresh", "post",
+             reverse("user:token_refresh"),
+             lambda number: {"refresh": refresh_token}, None),
+            ("user token verify", "post",
+             reverse("user:token_verify"),
+             lambda number: {"token": refresh_token}, None),
+            ("user me", "get", reverse("user:manage_user"), None, user),
+        ]
+
+    def run_endpoints(self, options):
+        results = {}
+        request_count = options["warmup"] + options["requests"]
+        for name, method, url, payload, user in self.endpoints(options):
+            if url is None:
+                continue
+            client = APIClient(REMOTE_ADDR=REMOTE_ADDR)
+            if user:
+                client.credentials(
+                    HTTP_AUTHORIZATION="Bearer "
+                    + str(
+                        UserClaimsTokenObtainPairSerializer
+                        .get_token(user)
+                        .access_token
+                    )
+                )
+
+            latencies, queries, sql_times, sizes = [], [], [], []
+            statuses = set()
+            for number in range(request_count):
+                data = payload(number) if payload else None
+                # Files are only sent as multipart form data
+                request_format = (
+                    "multipart"
+                    if data and any(
+                        isinstance(value, File) for value in data.values()
+                    )
+                    else "json"
+                )
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(
+                        url(number) if callable(url) else url,
+                        data,
+                        format=request_format,
+                    )
+                    latency = time.perf_counter() - started
+                if number < options["warmup"]:
+                    continue
+                latencies.append(latency * 1000)
+                queries.append(len(context.captured_queries))
+                sql_times.append(sum(
+                    float(query["time"])
+                    for query in context.captured_queries
+                ) * 1000)
+                sizes.append(len(response.content))
+                statuses.add(response.status_code)
+
+            latencies.sort()
+            results[name] = {
+                "method": method.upper(),
+                "url": url(0) if callable(url) else url,
+                "status_codes": sorted(statuses),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "queries": max(queries),
+                "sql_ms": round(sum(sql_times) / len(sql_times), 3),
+                "response_bytes": max(sizes),
+            }
+            self.stderr.write(
+                f"{name}: p50 {results[name]['p50_ms']}ms, "
+                f"{results[name]['queries']} queries"
+            )
+        return results
+
+    def print_comparison(self, baseline, report):
+        self.stderr.write(
+            f"Compared to {baseline['meta'].get('commit') or 'baseline'}:"
+        )
+        for name, result in report["results"].items():
+            previous = baseline["results"].get(name)
+            if previous is None:
+                self.stderr.write(f"  {name}: new endpoint")
+                continue
+            self.stderr.write(
+                f"  {name}: p50 {previous['p50_ms']} -> {result['p50_ms']}ms, "
+                f"queries {previous['queries']} -> {result['queries']}, "
+                f"bytes {previous['response_bytes']} -> "
+                f"{result['response_bytes']}"
+            )
@@ -0,0 +1,485 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+
+from centauri.management.commands.benchmark_api import (
+    REMOTE_ADDR,
+    percentile,
+    positive_int,
+)
+from centauri.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from user.serializers import UserClaimsTokenObtainPairSerializer
+
+SAMPLE_INTERVAL = 0.02
+
+
+class ResourceMonitor:
+    """Sample threads of the process and its database connections"""
+
+    def __init__(self):
+        self.threads = self.connections = 0
+        self.peak_threads = self.peak_connections = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT count(*) - 1 FROM pg_stat_activity "
+                        "WHERE datname = current_database()"
+                    )
+                    self.connections = cursor.fetchone()[0]
+                self.threads = threading.active_count()
+                self.peak_connections = max(
+                    self.peak_connections, self.connections
+                )
+                self.peak_threads = max(self.peak_threads, self.threads)
+                self.stopped.wait(SAMPLE_INTERVAL)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def wsgi_get(handler, path, query=None, headers=None):
+    """Status code, headers and body of a GET through the WSGI handler"""
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": urlencode(query or {}),
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": REMOTE_ADDR,
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "HTTP_HOST": "testserver",
+    }
+    for name, value in (headers or {}).items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+    started = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        started["status"] = int(status.split()[0])
+        started["headers"] = dict(response_headers)
+
+    response = handler(environ, start_response)
+    try:
+        body = b"".join(response)
+    finally:
+        response.close()
+    return started["status"], started["headers"], body
+
+
+async def asgi_get(application, path, query=None, headers=None):
+    """Status code and body of a GET through the ASGI handler"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query or {}).encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")] + [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        "client": (REMOTE_ADDR, 0),
+        "server": ("testserver", 80),
+    }
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+    disconnected = asyncio.Event()
+    response = {"body": []}
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await application(scope, receive, send)
+    disconnected.set()
+    return response["status"], b"".join(response["body"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency, threads and database connections of the sync "
+        "WSGI endpoints and the async ASGI endpoints under concurrent "
+        "clients, and of short polling against long polling"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=positive_int,
+            default=50,
+            help="Concurrent clients, WSGI serves each in a thread",
+        )
+        parser.add_argument(
+            "--requests",
+            type=positive_int,
+            default=10,
+            help="Sequential requests of every client per endpoint",
+        )
+        parser.add_argument(
+            "--poll-clients",
+            type=positive_int,
+            default=200,
+            help="Clients polling one show session for a change",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds between short polls of sync clients",
+        )
+        parser.add_argument(
+            "--change-after",
+            type=float,
+            default=3.0,
+            help="Seconds until the polled show session changes",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            self.seed()
+            # Repeated requests must reach the endpoints instead of 429s
+            with patch.object(APIView, "throttle_classes", ()):
+                results = self.run_endpoints(options)
+                results.update(self.run_polls(options))
+        finally:
+            connection.close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "clients": options["clients"],
+                "requests": options["requests"],
+                "poll_clients": options["poll_clients"],
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def seed(self):
+        user = get_user_model().objects.create_user(
+            email="user@benchmark.test",
+            password="benchmark-password",
+        )
+        self.headers = {
+            "Authorization": "Bearer " + str(
+                UserClaimsTokenObtainPairSerializer
+                .get_token(user)
+                .access_token
+            )
+        }
+        planetarium_dome = PlanetariumDome.objects.create(
+            name="Dome", rows=30, seats_in_row=40
+        )
+        show_themes = ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"Theme {index}") for index in range(5)
+        )
+        astronomy_shows = AstronomyShow.objects.bulk_create(
+            AstronomyShow(title=f"Astronomy show {index}")
+            for index in range(20)
+        )
+        for astronomy_show in astronomy_shows:
+            astronomy_show.show_themes.add(*show_themes[:3])
+        self.show_sessions = ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=astronomy_shows[index % 20],
+                planetarium_dome=planetarium_dome,
+                show_time=timezone.now() + timedelta(hours=index + 1),
+            )
+            for index in range(100)
+        )
+        reservation = Reservation.objects.create(user=user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                reservation=reservation,
+                show_session=self.show_sessions[0],
+                row=row,
+                seat=seat,
+            )
+            for row in range(1, 11)
+            for seat in range(1, 41)
+        )
+        ShowSession.update_sold_places({self.show_sessions[0].id: 400})
+
+    def endpoints(self):
+        """Return (name, sync path, async path) of every read endpoint"""
+        show_session_id = self.show_sessions[0].id
+        return [
+            ("show_sessions list",
+             reverse("centauri:showsession-list"),
+             reverse("centauri:async-showsession-list")),
+            ("show_sessions retrieve",
+             reverse("centauri:showsession-detail", args=(show_session_id,)),
+             reverse(
+                 "centauri:async-showsession-detail",
+                 args=(show_session_id,)
+             )),
+            ("show_sessions seat_map",
+             reverse(
+                 "centauri:showsession-seat-map", args=(show_session_id,)
+             ),
+             reverse(
+                 "centauri:async-showsession-seat-map",
+                 args=(show_session_id,)
+             )),
+            ("astronomy_shows list",
+             reverse("centauri:astronomyshow-list"),
+             reverse("centauri:async-astronomyshow-list")),
+        ]
+
+    @staticmethod
+    def summarize(latencies, statuses, wall_time, monitor) -> dict:
+        latencies = sorted(latency * 1000 for latency in latencies)
+        return {
+            "requests": len(latencies),
+            "status_codes": sorted(set(statuses)),
+            "throughput_rps": round(len(latencies) / wall_time, 1),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "peak_threads": monitor.peak_threads,
+            "peak_db_connections": monitor.peak_connections,
+        }
+
+    def run_endpoints(self, options):
+        results = {}
+        wsgi_handler = WSGIHandler()
+        asgi_handler = ASGIHandler()
+
+        for name, sync_path, async_path in self.endpoints():
+            latencies, statuses = [], []
+
+            def sync_client():
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    status, _, _ = wsgi_get(
+                        wsgi_handler, sync_path, headers=self.headers
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    statuses.append(status)
+
+            with (
+                ResourceMonitor() as monitor,
+                ThreadPoolExecutor(max_workers=options["clients"]) as pool,
+            ):
+                started = time.perf_counter()
+                for _ in range(options["clients"]):
+                    pool.submit(sync_client)
+                pool.shutdown(wait=True)
+                wall_time = time.perf_counter() - started
+            results[f"{name} sync"] = self.summarize(
+                latencies, statuses, wall_time, monitor
+            )
+
+            latencies, statuses = [], []
+
+            async def async_client():
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    status, _ = await asgi_get(
+                        asgi_handler, async_path, headers=self.headers
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    statuses.append(status)
+
+            async def async_clients():
+                await asyncio.gather(
+                    *(async_client() for _ in range(options["clients"]))
+                )
+
+            with ResourceMonitor() as monitor:
+                started = time.perf_counter()
+                asyncio.run(async_clients())
+                wall_time = time.perf_counter() - started
+            results[f"{name} async"] = self.summarize(
+                latencies, statuses, wall_time, monitor
+            )
+
+            for mode in ("sync", "async"):
+                result = results[f"{name} {mode}"]
+                self.stderr.write(
+                    f"{name} {mode}: {result['throughput_rps']} rps, "
+                    f"p95 {result['p95_ms']}ms, "
+                    f"{result['peak_threads']} threads, "
+                    f"{result['peak_db_connections']} connections"
+                )
+        return results
+
+    @staticmethod
+    def change_show_session(show_session_id):
+        # A zero delta only bumps the version, like a sold ticket
+        try:
+            ShowSession.update_sold_places({show_session_id: 0})
+        finally:
+            connection.close()
+
+    def run_polls(self, options):
+        """
+        Clients wait for a change of one show session. Sync clients poll
+        the retrieve endpoint served by a pool of --clients WSGI threads,
+        async clients long poll the seat map
+        """
+        show_session_id = self.show_sessions[1].id
+        sync_path = reverse(
+            "centauri:showsession-detail", args=(show_session_id,)
+        )
+        async_path = reverse(
+            "centauri:async-showsession-seat-map", args=(show_session_id,)
+        )
+        wait = int(options["change_after"]) + 5
+        wsgi_handler = WSGIHandler()
+        asgi_handler = ASGIHandler()
+        changed = {}
+
+        async def sync_client(server_threads, etag, delays, statuses):
+            while True:
+                status, _, _ = await asyncio.get_running_loop(
+                ).run_in_executor(
+                    server_threads,
+                    lambda: wsgi_get(
+                        wsgi_handler,
+                        sync_path,
+                        headers={**self.headers, "If-None-Match": etag},
+                    ),
+                )
+                statuses.append(status)
+                if status != 304:
+                    delays.append(time.perf_counter() - changed["at"])
+                    return
+                await asyncio.sleep(options["poll_interval"])
+
+        async def async_client(etag, delays, statuses):
+            status, _ = await asgi_get(
+                asgi_handler,
+                async_path,
+                {"wait": wait},
+                headers={**self.headers, "If-None-Match": etag},
+            )
+            statuses.append(status)
+            delays.append(time.perf_counter() - changed["at"])
+
+        async def poll(client, monitor, *args):
+            clients = asyncio.gather(*(
+                client(*args) for _ in range(options["poll_clients"])
+            ))
+            await asyncio.sleep(options["change_after"])
+            waiting = (monitor.threads, monitor.connections)
+            changed["at"] = time.perf_counter()
+            await sync_to_async(self.change_show_session)(show_session_id)
+            await clients
+            return waiting
+
+        results = {}
+        for name, client, server_threads in (
+            ("show_sessions retrieve short poll sync", sync_client,
+             ThreadPoolExecutor(max_workers=options["clients"])),
+            ("show_sessions seat_map long poll async", async_client, None),
+        ):
+            delays, statuses = [], []
+            etag = self.get_etag(wsgi_handler, sync_path)
+            args = (etag, delays, statuses)
+            if server_threads is not None:
+                args = (server_threads,) + args
+            with ResourceMonitor() as monitor:
+                waiting_threads, waiting_connections = asyncio.run(
+                    poll(client, monitor, *args)
+                )
+            if server_threads is not None:
+                server_threads.shutdown()
+
+            delays = sorted(delay * 1000 for delay in delays)
+            results[name] = {
+                "requests": len(statuses),
+                "status_codes": sorted(set(statuses)),
+                "change_seen_p50_ms": round(percentile(delays, 50), 3),
+                "change_seen_p95_ms": round(percentile(delays, 95), 3),
+                "waiting_threads": waiting_threads,
+                "waiting_db_connections": waiting_connections,
+                "peak_threads": monitor.peak_threads,
+                "peak_db_connections": monitor.peak_connections,
+            }
+            self.stderr.write(
+                f"{name}: {len(statuses)} requests, change seen after "
+                f"p95 {results[name]['change_seen_p95_ms']}ms, "
+                f"{waiting_threads} threads and {waiting_connections} "
+                f"connections while waiting"
+            )
+        return results
+
+    def get_etag(self, wsgi_handler, path) -> str:
+        _, headers, _ = wsgi_get(wsgi_handler, path, headers=self.headers)
+        return headers["ETag"]
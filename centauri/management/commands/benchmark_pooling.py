@@ -0,0 +1,206 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.views import APIView
+
+from centauri.management.commands.benchmark_api import positive_int
+from centauri.management.commands.benchmark_concurrency import (
+    Command as ConcurrencyCommand,
+    ResourceMonitor,
+    asgi_get,
+    wsgi_get,
+)
+
+DEFAULT_POOL_OPTIONS = {"min_size": 2, "max_size": 10}
+PERSISTENT_CONN_MAX_AGE = 60
+
+
+class Command(ConcurrencyCommand):
+    help = (
+        "Compare requests per second of the endpoints opening a database "
+        "connection per request, keeping a persistent connection per "
+        "thread and taking connections from the psycopg pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=positive_int,
+            default=20,
+            help="Concurrent clients, WSGI serves each in a thread",
+        )
+        parser.add_argument(
+            "--requests",
+            type=positive_int,
+            default=20,
+            help="Sequential requests of every client per endpoint",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        pool_options = (
+            settings.DATABASES["default"]["OPTIONS"].get("pool")
+            or DEFAULT_POOL_OPTIONS
+        )
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            self.seed()
+            # Repeated requests must reach the endpoints instead of 429s
+            with patch.object(APIView, "throttle_classes", ()):
+                results = self.run_modes(options, pool_options)
+        finally:
+            connection.close()
+            connection.close_pool()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "clients": options["clients"],
+                "requests": options["requests"],
+                "pool": pool_options,
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    @contextmanager
+    def database_mode(conn_max_age, pool_options):
+        """
+        Switch connections of every thread to CONN_MAX_AGE and pool
+        options, threads share the settings dict of the connection
+        """
+        settings_dict = connection.settings_dict
+        saved = (
+            settings_dict["CONN_MAX_AGE"],
+            settings_dict["OPTIONS"].get("pool"),
+        )
+
+        def apply(conn_max_age, pool_options):
+            connection.close()
+            connection.close_pool()
+            settings_dict["CONN_MAX_AGE"] = conn_max_age
+            settings_dict["OPTIONS"].pop("pool", None)
+            if pool_options:
+                settings_dict["OPTIONS"]["pool"] = pool_options
+
+        apply(conn_max_age, pool_options)
+        try:
+            yield
+        finally:
+            apply(*saved)
+
+    def run_modes(self, options, pool_options):
+        """
+        Persistent connections are only measured with WSGI, the ASGI
+        handler runs every request in a new thread and connections kept
+        by these threads are never reused
+        """
+        results = {}
+        for mode, conn_max_age, mode_pool_options, servers in (
+            ("no pooling", 0, None, ("sync", "async")),
+            ("persistent", PERSISTENT_CONN_MAX_AGE, None, ("sync",)),
+            ("pool", 0, pool_options, ("sync", "async")),
+        ):
+            with self.database_mode(conn_max_age, mode_pool_options):
+                for name, sync_path, async_path in self.endpoints():
+                    if "sync" in servers:
+                        results[f"{name} sync {mode}"] = self.run_sync(
+                            sync_path, options
+                        )
+                    if "async" in servers:
+                        results[f"{name} async {mode}"] = self.run_async(
+                            async_path, options
+                        )
+
+        for name, _, _ in self.endpoints():
+            for server in ("sync", "async"):
+                line = ", ".join(
+                    f"{mode} {result['throughput_rps']} rps "
+                    f"({result['peak_db_connections']} connections)"
+                    for mode in ("no pooling", "persistent", "pool")
+                    if (result := results.get(f"{name} {server} {mode}"))
+                )
+                self.stderr.write(f"{name} {server}: {line}")
+        return results
+
+    def run_sync(self, path, options) -> dict:
+        latencies, statuses = [], []
+        wsgi_handler = WSGIHandler()
+
+        def sync_client():
+            try:
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    status, _, _ = wsgi_get(
+                        wsgi_handler, path, headers=self.headers
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    statuses.append(status)
+            finally:
+                # Persistent connections outlive requests, not the thread
+                connection.close()
+
+        with (
+            ResourceMonitor() as monitor,
+            ThreadPoolExecutor(max_workers=options["clients"]) as pool,
+        ):
+            started = time.perf_counter()
+            for _ in range(options["clients"]):
+                pool.submit(sync_client)
+            pool.shutdown(wait=True)
+            wall_time = time.perf_counter() - started
+        return self.summarize(latencies, statuses, wall_time, monitor)
+
+    def run_async(self, path, options) -> dict:
+        latencies, statuses = [], []
+        asgi_handler = ASGIHandler()
+
+        async def async_client():
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                status, _ = await asgi_get(
+                    asgi_handler, path, headers=self.headers
+                )
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+
+        async def async_clients():
+            await asyncio.gather(
+                *(async_client() for _ in range(options["clients"]))
+            )
+
+        with ResourceMonitor() as monitor:
+            started = time.perf_counter()
+            asyncio.run(async_clients())
+            wall_time = time.perf_counter() - started
+        return self.summarize(latencies, statuses, wall_time, monitor)
@@ -0,0 +1,184 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import mean
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.views import APIView
+
+from centauri.management.commands.benchmark_api import (
+    percentile,
+    positive_int,
+)
+from centauri.management.commands.benchmark_concurrency import (
+    Command as ConcurrencyCommand,
+)
+from centauri.management.commands.startup_timings import run_startup_process
+
+PROFILES = ("dev", "prod")
+# Requests from INTERNAL_IPS, the debug toolbar collects them in dev
+REMOTE_ADDR = "127.0.0.1"
+WARMUP_REQUESTS = 5
+
+
+class Command(ConcurrencyCommand):
+    help = (
+        "Compare startup time and per-request overhead of the dev and "
+        "prod settings profiles, every profile runs in its own process"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=positive_int,
+            default=200,
+            help="Requests per endpoint and profile",
+        )
+        parser.add_argument(
+            "--startup-runs",
+            type=positive_int,
+            default=5,
+            help="New processes started per profile",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--profile-requests",
+            action="store_true",
+            help="Only time requests with the profile of this process",
+        )
+
+    def handle(self, *args, **options):
+        if options["profile_requests"]:
+            self.stdout.write(json.dumps(self.run_requests(options)))
+            return
+
+        results = {}
+        for profile in PROFILES:
+            env = {
+                **os.environ,
+                "DJANGO_ENV": profile,
+                "DJANGO_SETTINGS_MODULE": "planetarium.settings",
+            }
+            env.setdefault("DJANGO_SECRET_KEY", settings.SECRET_KEY)
+            results[profile] = {
+                "startup": self.run_startup(env, options["startup_runs"]),
+                "requests": json.loads(subprocess.run(
+                    [
+                        sys.executable,
+                        str(settings.BASE_DIR / "manage.py"),
+                        "benchmark_settings",
+                        "--profile-requests",
+                        "--requests",
+                        str(options["requests"]),
+                    ],
+                    env=env,
+                    cwd=settings.BASE_DIR,
+                    capture_output=True,
+                    check=True,
+                    text=True,
+                ).stdout),
+            }
+            self.report_profile(profile, results[profile])
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "requests": options["requests"],
+                "startup_runs": options["startup_runs"],
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def run_startup(env, runs) -> dict:
+        """Median setup time and wall time of new processes"""
+        setup_times, process_times = [], []
+        for _ in range(runs):
+            timings, process_time = run_startup_process(env)
+            setup_times.append(timings["total"])
+            process_times.append(process_time)
+        return {
+            "setup_p50_ms": round(
+                percentile(sorted(setup_times), 50) * 1000, 3
+            ),
+            "process_p50_ms": round(
+                percentile(sorted(process_times), 50) * 1000, 3
+            ),
+        }
+
+    def run_requests(self, options) -> dict:
+        # The profile decides DEBUG, the test environment keeps it
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            self.seed()
+            with patch.object(APIView, "throttle_classes", ()):
+                return {
+                    name: self.time_endpoint(path, options["requests"])
+                    for name, path, _ in self.endpoints()
+                }
+        finally:
+            connection.close()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def time_endpoint(self, path, requests) -> dict:
+        client = Client(
+            REMOTE_ADDR=REMOTE_ADDR,
+            headers=self.headers,
+        )
+        for _ in range(WARMUP_REQUESTS):
+            client.get(path)
+
+        latencies, statuses = [], []
+        for _ in range(requests):
+            started = time.perf_counter()
+            statuses.append(client.get(path).status_code)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        latencies.sort()
+        return {
+            "status_codes": sorted(set(statuses)),
+            "mean_ms": round(mean(latencies), 3),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            # Queries DEBUG kept in memory during the last request
+            "logged_queries": len(connection.queries),
+        }
+
+    def report_profile(self, profile, result):
+        startup = result["startup"]
+        self.stderr.write(
+            f"{profile}: setup {startup['setup_p50_ms']}ms, "
+            f"process {startup['process_p50_ms']}ms"
+        )
+        for name, timings in result["requests"].items():
+            self.stderr.write(
+                f"{profile} {name}: p50 {timings['p50_ms']}ms, "
+                f"mean {timings['mean_ms']}ms, "
+                f"{timings['logged_queries']} logged queries"
+            )
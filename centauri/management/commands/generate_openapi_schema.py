@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from centauri.schema import (
+    generate_schema,
+    get_code_version,
+    read_schema_file,
+    write_schema_file,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema served at api/v1/schema/ into "
+        "OPENAPI_SCHEMA_FILE, unless it was generated from this code "
+        "version already"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Generate the schema even if the file is up to date",
+        )
+
+    def handle(self, *args, **options):
+        version = get_code_version()
+        if not options["force"] and read_schema_file(version) is not None:
+            self.stdout.write(
+                f"Schema of code version {version} is up to date"
+            )
+            return
+
+        write_schema_file(version, generate_schema())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated schema of code version {version} into "
+            f"{settings.OPENAPI_SCHEMA_FILE}"
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from centauri.models import ShowSession, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild stored sold places of show sessions from their tickets, "
+        "corrected sessions get a new version for ETags and rollups"
+    )
+
+    def handle(self, *args, **options):
+        sold_places = (
+            Ticket.objects
+            .filter(show_session=OuterRef("pk"))
+            .order_by()
+            .values("show_session")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        counted = Coalesce(Subquery(sold_places), 0)
+        with transaction.atomic():
+            updated = ShowSession.objects.exclude(
+                sold_places=counted
+            ).update(
+                sold_places=counted,
+                version=F("version") + 1,
+                updated_at=Now(),
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recounted sold places, corrected {updated} sessions"
+            )
+        )
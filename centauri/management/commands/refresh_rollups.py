@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from centauri.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh daily occupancy, sales and theme rollups of days with "
+        "show sessions or tickets changed since the last run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the rollups of all days, e.g. after show sessions "
+                 "were moved or deleted or show themes changed",
+        )
+        parser.add_argument(
+            "--overlap",
+            type=int,
+            default=300,
+            help="Seconds before the watermark to look back for changes "
+                 "committed late",
+        )
+
+    def handle(self, *args, **options):
+        days = refresh_rollups(
+            full=options["full"],
+            overlap=timedelta(seconds=options["overlap"]),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed rollups of {len(days)} days")
+        )
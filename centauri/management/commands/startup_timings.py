@@ -0,0 +1,120 @@
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from centauri.management.commands.benchmark_api import (
+    percentile,
+    positive_int,
+)
+
+# Every phase is timed from the end of the previous one in a new process
+STARTUP_SCRIPT = """
+import json
+import time
+
+timings = {}
+started = last = time.perf_counter()
+
+
+def phase(name):
+    global last
+    now = time.perf_counter()
+    timings[name] = now - last
+    last = now
+
+
+import django
+from django.conf import settings
+phase("django_import")
+settings.INSTALLED_APPS
+phase("settings")
+django.setup()
+phase("app_registry")
+import centauri.serializers
+import user.serializers
+phase("serializers")
+from django.urls import get_resolver
+get_resolver().url_patterns
+phase("urls")
+timings["total"] = last - started
+print(json.dumps(timings))
+"""
+PHASES = (
+    "django_import",
+    "settings",
+    "app_registry",
+    "serializers",
+    "urls",
+    "total",
+)
+
+
+def run_startup_process(env=None) -> tuple[dict[str, float], float]:
+    """Phase timings of a new process and its wall time in seconds"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        env=env,
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(completed.stdout), time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the time new processes spend importing Django, loading "
+        "settings, populating the app registry and importing serializers "
+        "and the URLconf"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=positive_int,
+            default=5,
+            help="New processes to time, the report has the medians",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        runs = [run_startup_process() for _ in range(options["runs"])]
+
+        results = {
+            f"{phase}_p50_ms": round(percentile(
+                sorted(timings[phase] for timings, _ in runs), 50
+            ) * 1000, 3)
+            for phase in PHASES
+        }
+        # Wall time, with interpreter start and exit around the phases
+        results["process_p50_ms"] = round(percentile(
+            sorted(process_time for _, process_time in runs), 50
+        ) * 1000, 3)
+        for name, value in results.items():
+            self.stderr.write(f"{name.removesuffix('_p50_ms')}: {value}ms")
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "runs": options["runs"],
+                "settings": settings.SETTINGS_MODULE,
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as report_file:
+                report_file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from centauri.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds"
+
+    def handle(self, *args, **options):
+        _, deleted = SeatHold.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted.get('centauri.SeatHold', 0)} "
+                f"expired seat holds"
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from centauri.models import ThrottleBucket
+
+
+class Command(BaseCommand):
+    help = "Delete throttle buckets of past windows"
+
+    def handle(self, *args, **options):
+        deleted, _ = ThrottleBucket.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired throttle buckets")
+        )
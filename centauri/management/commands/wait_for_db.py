@@ -1,21 +1,140 @@
+import math
 import time
-from django.db import connections
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+# libpq rounds smaller connect timeouts up to 2 seconds
+MIN_CONNECT_TIMEOUT = 2
 
 
 class Command(BaseCommand):
+    help = (
+        "Wait for the database with exponential backoff, and with "
+        "--migrate apply migrations only if some are unapplied"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to wait for",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30.0,
+            help="Seconds to wait for the database in total",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.1,
+            help="Seconds before the first retry, doubled after each one",
+        )
+        parser.add_argument(
+            "--max-interval",
+            type=float,
+            default=2.0,
+            help="Most seconds between retries",
+        )
+        parser.add_argument(
+            "--migrate",
+            action="store_true",
+            help="Run migrate once the database is available, unless "
+                 "every migration is applied already",
+        )
+
     def handle(self, *args, **options):
-        success_connection = None
-        max_attempt = 30
-        attempt = 1
-        while not success_connection and attempt <= max_attempt:
+        self.verbosity = options["verbosity"]
+        connection = connections[options["database"]]
+
+        started = time.monotonic()
+        attempts = self.wait_for_database(
+            connection,
+            timeout=options["timeout"],
+            interval=options["interval"],
+            max_interval=options["max_interval"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Database available after {time.monotonic() - started:.2f}s "
+            f"and {attempts} attempts"
+        ))
+
+        if options["migrate"]:
+            started = time.monotonic()
+            plan = self.get_migration_plan(connection)
+            checked = time.monotonic() - started
+            if not plan:
+                self.stdout.write(
+                    f"Migrations checked in {checked:.2f}s, all applied, "
+                    f"skipping migrate"
+                )
+                return
+
+            self.stdout.write(
+                f"Migrations checked in {checked:.2f}s, "
+                f"{len(plan)} to apply"
+            )
+            started = time.monotonic()
+            call_command(
+                "migrate",
+                database=options["database"],
+                verbosity=options["verbosity"],
+                stdout=self.stdout,
+                stderr=self.stderr,
+            )
+            self.stdout.write(
+                f"Migrated in {time.monotonic() - started:.2f}s"
+            )
+
+    def wait_for_database(
+            self,
+            connection,
+            timeout: float,
+            interval: float,
+            max_interval: float,
+    ) -> int:
+        """
+        Connect until the database answers, outside of the connection
+        pool so every attempt is bounded by the time left. Return the
+        number of attempts
+        """
+        deadline = time.monotonic() + timeout
+        connection_params = connection.get_connection_params()
+        attempts = 0
+        while True:
+            attempts += 1
+            remaining = deadline - time.monotonic()
             try:
-                success_connection = connections["default"]
-                success_connection.cursor()
-            except OperationalError:
-                time.sleep(1)
-                attempt += 1
-            finally:
-                if success_connection:
-                    success_connection.close()
+                with connection.wrap_database_errors:
+                    connection.Database.connect(
+                        **connection_params,
+                        connect_timeout=max(
+                            MIN_CONNECT_TIMEOUT, math.ceil(remaining)
+                        ),
+                    ).close()
+                return attempts
+            except OperationalError as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {timeout}s and "
+                        f"{attempts} attempts: {exc}"
+                    )
+                if self.verbosity > 1:
+                    self.stdout.write(
+                        f"Database unavailable, retrying in "
+                        f"{min(interval, remaining):.2f}s"
+                    )
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, max_interval)
+
+    @staticmethod
+    def get_migration_plan(connection) -> list:
+        """Unapplied migrations, without the checks of migrate"""
+        executor = MigrationExecutor(connection)
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_sold_places(apps, schema_editor):
+    ShowSession = apps.get_model("centauri", "ShowSession")
+    Ticket = apps.get_model("centauri", "Ticket")
+    sold_places = (
+        Ticket.objects
+        .filter(show_session=OuterRef("pk"))
+        .order_by()
+        .values("show_session")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    ShowSession.objects.update(
+        sold_places=Coalesce(Subquery(sold_places), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("centauri", "0007_showsession_unique_planetarium_dome_show_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="sold_places",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_sold_places, migrations.RunPython.noop),
+    ]
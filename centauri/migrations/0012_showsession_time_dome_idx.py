@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("centauri", "0011_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["show_time", "planetarium_dome"],
+                name="show_session_time_dome_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("centauri", "0012_showsession_time_dome_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("centauri", "0014_throttlebucket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=63, primary_key=True, serialize=False),
+                ),
+                ("updated_until", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="showsession",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name="DailyDomeOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("show_sessions", models.PositiveIntegerField()),
+                ("capacity", models.PositiveIntegerField()),
+                ("sold_places", models.PositiveIntegerField()),
+                (
+                    "planetarium_dome",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_occupancy",
+                        to="centauri.planetariumdome",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "planetarium_dome"),
+                        name="unique_daily_dome_occupancy_day_planetarium_dome",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyShowSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("show_sessions", models.PositiveIntegerField()),
+                ("tickets", models.PositiveIntegerField()),
+                (
+                    "astronomy_show",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_sales",
+                        to="centauri.astronomyshow",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "astronomy_show"),
+                        name="unique_daily_show_sales_day_astronomy_show",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyThemePopularity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("tickets", models.PositiveIntegerField()),
+                (
+                    "show_theme",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_popularity",
+                        to="centauri.showtheme",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "show_theme"),
+                        name="unique_daily_theme_popularity_day_show_theme",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("centauri", "0015_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="poster_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
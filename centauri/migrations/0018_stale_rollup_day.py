@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("centauri", "0017_catalog_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StaleRollupDay",
+            fields=[
+                ("day", models.DateField(primary_key=True, serialize=False)),
+                ("marked_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,15 +1,37 @@
 import pathlib
 import uuid
+from collections import defaultdict
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import (
+    UniqueConstraint,
+    F,
+    Case,
+    When,
+    Value,
+    IntegerField,
+    Max,
+)
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.text import slugify
 
 
 class ShowTheme(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="show_theme_name_trgm_idx"
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -24,6 +46,12 @@ def astronomy_show_poster_path(
     return pathlib.Path("upload/astronomy_shows/") / pathlib.Path(filename)
 
 
+ASTRONOMY_SHOW_SEARCH_VECTOR = (
+    SearchVector("title", weight="A", config="english")
+    + SearchVector("description", weight="B", config="english")
+)
+
+
 class AstronomyShow(models.Model):
     title = models.CharField(max_length=255, unique=True)
     description = models.TextField(null=True, blank=True)
@@ -32,6 +60,24 @@ class AstronomyShow(models.Model):
         related_name="astronomy_shows",
     )
     poster = models.ImageField(null=True, upload_to=astronomy_show_poster_path)
+    poster_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                ASTRONOMY_SHOW_SEARCH_VECTOR,
+                name="astronomy_show_search_idx"
+            ),
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="astronomy_show_title_trgm_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -41,6 +87,15 @@ class PlanetariumDome(models.Model):
     name = models.CharField(max_length=255, unique=True)
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="planetarium_dome_name_trgm_idx"
+            )
+        ]
 
     @property
     def capacity(self) -> int:
@@ -50,6 +105,24 @@ class PlanetariumDome(models.Model):
         return self.name
 
 
+SHOW_SESSION_AVAILABLE_PLACES = (
+    F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
+    - F("sold_places")
+)
+# Update times of the rows show session responses are built from
+SHOW_SESSION_ETAG_VALUES = {
+    "astronomy_show_updated_at": F("astronomy_show__updated_at"),
+    "planetarium_dome_updated_at": F("planetarium_dome__updated_at"),
+    "show_themes_updated_at": Max("astronomy_show__show_themes__updated_at"),
+}
+SHOW_SESSION_ETAG_FIELDS = (
+    "id",
+    "version",
+    "updated_at",
+    *SHOW_SESSION_ETAG_VALUES,
+)
+
+
 class ShowSession(models.Model):
     astronomy_show = models.ForeignKey(
         AstronomyShow,
@@ -62,6 +135,9 @@ class ShowSession(models.Model):
         related_name="show_sessions",
     )
     show_time = models.DateTimeField()
+    sold_places = models.PositiveIntegerField(default=0, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         constraints = [
@@ -70,6 +146,103 @@ class ShowSession(models.Model):
                 name="unique_planetarium_dome_show_time"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["show_time", "id"],
+                name="show_session_show_time_id_idx"
+            ),
+            models.Index(
+                fields=["show_time", "planetarium_dome"],
+                name="show_session_time_dome_idx"
+            ),
+        ]
+
+    @staticmethod
+    def update_sold_places(sold_places_deltas: dict[int, int]) -> None:
+        """
+        Shift the stored sold places of show sessions by given deltas
+        and bump their versions and update times.
+        """
+        if not sold_places_deltas:
+            return
+
+        ShowSession.objects.filter(id__in=sold_places_deltas).update(
+            sold_places=F("sold_places") + Case(
+                *[
+                    When(id=show_session_id, then=Value(delta))
+                    for show_session_id, delta in sold_places_deltas.items()
+                ],
+                output_field=IntegerField(),
+            ),
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+
+    def find_free_places(
+            self,
+            count: int,
+            row_from: int = 1,
+            row_to: int | None = None,
+    ) -> tuple[int, int] | None:
+        """
+        Find the best block of count adjacent seats that are neither sold
+        nor actively held and return its (row, first seat).
+
+        Rows closest to the middle of the row range win, then blocks
+        closest to the middle of the row.
+        """
+        planetarium_dome = self.planetarium_dome
+        seats_in_row = planetarium_dome.seats_in_row
+        row_to = min(row_to or planetarium_dome.rows, planetarium_dome.rows)
+
+        sold_places = self.tickets.values_list("row", "seat")
+        held_places = self.held_seats.filter(
+            hold__expires_at__gt=timezone.now()
+        ).values_list("row", "seat")
+        taken_seats = defaultdict(list)
+        for row, seat in sold_places.union(held_places):
+            taken_seats[row].append(seat)
+
+        middle_row = (row_from + row_to) / 2
+        centered_seat = (seats_in_row - count) // 2 + 1
+        best_score = best_place = None
+        for row in range(row_from, row_to + 1):
+            free_from = 1
+            for taken_seat in sorted(taken_seats[row]) + [seats_in_row + 1]:
+                free_to = taken_seat - count
+                if free_from <= free_to:
+                    first_seat = min(max(centered_seat, free_from), free_to)
+                    score = (
+                        abs(row - middle_row),
+                        abs(first_seat - centered_seat),
+                    )
+                    if best_score is None or score < best_score:
+                        best_score, best_place = score, (row, first_seat)
+                free_from = taken_seat + 1
+
+        return best_place
+
+    def seat_map(self) -> bytes:
+        """
+        Pack taken places into a row-major bitmap with one bit per seat.
+
+        Seat (row, seat) maps to bit (row - 1) * seats_in_row + (seat - 1),
+        counted from the most significant bit of the first byte.
+        """
+        return self.pack_seat_map(self.tickets.values_list("row", "seat"))
+
+    async def aseat_map(self) -> bytes:
+        return self.pack_seat_map(
+            [place async for place in self.tickets.values_list("row", "seat")]
+        )
+
+    def pack_seat_map(self, places) -> bytes:
+        seats_in_row = self.planetarium_dome.seats_in_row
+        bitmap = bytearray((self.planetarium_dome.capacity + 7) // 8)
+        for row, seat in places:
+            index = (row - 1) * seats_in_row + (seat - 1)
+            bitmap[index // 8] |= 0x80 >> (index % 8)
+        return bytes(bitmap)
 
     def __str__(self):
         return (
@@ -87,6 +260,14 @@ class Reservation(models.Model):
         related_name="reservations",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="reservation_user_created_idx"
+            )
+        ]
+
     def __str__(self):
         return f"Client name: {self.user}, created: {self.created_at}"
 
@@ -147,3 +328,153 @@ class Ticket(models.Model):
             f"row: {self.row}, seat: {self.seat}, "
             f"reservation: {self.reservation}"
         )
+
+
+class SeatHold(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    show_session = models.ForeignKey(
+        ShowSession,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f"Client name: {self.user}, expires: {self.expires_at}"
+
+
+class HeldSeat(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        ShowSession,
+        on_delete=models.CASCADE,
+        related_name="held_seats",
+    )
+    hold = models.ForeignKey(
+        SeatHold,
+        on_delete=models.CASCADE,
+        related_name="seats",
+    )
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["seat", "row", "show_session"],
+                name="unique_held_seat_seat_row_show_session"
+            )
+        ]
+
+    def __str__(self):
+        return f"row: {self.row}, seat: {self.seat}, hold: {self.hold}"
+
+
+class ThrottleBucket(models.Model):
+    key = models.CharField(max_length=255)
+    window_start = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["key", "window_start"],
+                name="unique_throttle_bucket_key_window_start"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.key} since {self.window_start}: {self.count}"
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=63, primary_key=True)
+    updated_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.updated_until}"
+
+
+class StaleRollupDay(models.Model):
+    """Day that lost show sessions, deleted or moved to another day"""
+
+    day = models.DateField(primary_key=True)
+    marked_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.day} since {self.marked_at}"
+
+
+class DailyDomeOccupancy(models.Model):
+    day = models.DateField()
+    planetarium_dome = models.ForeignKey(
+        PlanetariumDome,
+        on_delete=models.CASCADE,
+        related_name="daily_occupancy",
+    )
+    show_sessions = models.PositiveIntegerField()
+    capacity = models.PositiveIntegerField()
+    sold_places = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["day", "planetarium_dome"],
+                name="unique_daily_dome_occupancy_day_planetarium_dome"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.planetarium_dome} on {self.day}: {self.sold_places}"
+
+
+class DailyShowSales(models.Model):
+    day = models.DateField()
+    astronomy_show = models.ForeignKey(
+        AstronomyShow,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+    show_sessions = models.PositiveIntegerField()
+    tickets = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["day", "astronomy_show"],
+                name="unique_daily_show_sales_day_astronomy_show"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.astronomy_show} on {self.day}: {self.tickets}"
+
+
+class DailyThemePopularity(models.Model):
+    day = models.DateField()
+    show_theme = models.ForeignKey(
+        ShowTheme,
+        on_delete=models.CASCADE,
+        related_name="daily_popularity",
+    )
+    tickets = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["day", "show_theme"],
+                name="unique_daily_theme_popularity_day_show_theme"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.show_theme} on {self.day}: {self.tickets}"
@@ -0,0 +1,48 @@
+from asgiref.sync import sync_to_async
+from rest_framework import pagination
+from rest_framework.pagination import CursorPagination
+
+
+class LimitOffsetPagination(pagination.LimitOffsetPagination):
+    """Limit/offset pagination that async views can await"""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [
+            item
+            async for item in queryset[self.offset:self.offset + self.limit]
+        ]
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination without a total count, pages cost the same.
+    Async views await the page of the same paginate_queryset()
+    """
+
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await sync_to_async(self.paginate_queryset)(
+            queryset, request, view
+        )
+
+
+class ShowSessionPagination(KeysetPagination):
+    ordering = ("show_time", "id")
+
+
+class ReservationPagination(KeysetPagination):
+    ordering = ("created_at", "id")
@@ -0,0 +1,138 @@
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+POSTER_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POSTER_MAX_PIXELS = 50_000_000
+POSTER_FORMATS = ("JPEG", "PNG", "WEBP")
+POSTER_RENDITION_WORKERS = 4
+
+# Bounding boxes of renditions, the aspect ratio is kept
+POSTER_RENDITION_SIZES = {
+    "thumbnail": (240, 360),
+    "medium": (640, 960),
+    "large": (1280, 1920),
+}
+POSTER_RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def validate_poster(upload) -> None:
+    """
+    Check size, format and dimensions of an uploaded poster from its
+    header, pixels are not decoded
+    """
+    if upload.size > POSTER_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            f"Poster must be at most "
+            f"{POSTER_MAX_UPLOAD_SIZE // (1024 * 1024)} MB."
+        )
+
+    try:
+        with Image.open(upload) as image:
+            image_format = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Upload a valid image.")
+    finally:
+        upload.seek(0)
+
+    if image_format not in POSTER_FORMATS:
+        raise ValidationError(
+            f"Poster must be one of {', '.join(POSTER_FORMATS)} images."
+        )
+    if width * height > POSTER_MAX_PIXELS:
+        raise ValidationError(
+            f"Poster must have at most {POSTER_MAX_PIXELS} pixels."
+        )
+
+
+@cache
+def get_rendition_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=POSTER_RENDITION_WORKERS,
+        thread_name_prefix="poster-renditions",
+    )
+
+
+def render_poster_size(poster_name: str, size_name: str) -> dict[str, str]:
+    """Save a poster resized to one of the sizes in every format"""
+    size = POSTER_RENDITION_SIZES[size_name]
+    poster_path = pathlib.Path(poster_name)
+    rendition_path = poster_path.parent / "renditions" / poster_path.stem
+
+    with (
+        default_storage.open(poster_name) as poster,
+        Image.open(poster) as image,
+    ):
+        # JPEG posters are decoded at the smallest scale above the size
+        image.draft("RGB", size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        renditions = {}
+        for extension, (image_format, options) in (
+            POSTER_RENDITION_FORMATS.items()
+        ):
+            buffer = BytesIO()
+            image.save(buffer, image_format, **options)
+            renditions[extension] = default_storage.save(
+                f"{rendition_path}-{size_name}.{extension}",
+                ContentFile(buffer.getvalue()),
+            )
+    return renditions
+
+
+def delete_poster_renditions(renditions: dict) -> None:
+    for paths in renditions.values():
+        for path in paths.values():
+            default_storage.delete(path)
+
+
+def generate_poster_renditions(poster_name: str) -> dict[str, dict]:
+    """
+    Render every size of a saved poster in the thread pool, Pillow
+    releases the GIL while resizing and encoding
+    """
+    futures = {
+        size_name: get_rendition_executor().submit(
+            render_poster_size, poster_name, size_name
+        )
+        for size_name in POSTER_RENDITION_SIZES
+    }
+
+    renditions = {}
+    error = None
+    for size_name, future in futures.items():
+        try:
+            renditions[size_name] = future.result()
+        except OSError as exc:
+            error = exc
+
+    if error is not None:
+        delete_poster_renditions(renditions)
+        raise error
+    return renditions
+
+
+def poster_rendition_urls(renditions: dict) -> dict[str, dict]:
+    """URLs of the renditions in the order of sizes and formats"""
+    return {
+        size_name: {
+            extension: default_storage.url(renditions[size_name][extension])
+            for extension in POSTER_RENDITION_FORMATS
+            if extension in renditions[size_name]
+        }
+        for size_name in POSTER_RENDITION_SIZES
+        if size_name in renditions
+    }
@@ -0,0 +1,161 @@
+from datetime import date, datetime, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from centauri.models import (
+    DailyDomeOccupancy,
+    DailyShowSales,
+    DailyThemePopularity,
+    RollupWatermark,
+    ShowSession,
+    StaleRollupDay,
+)
+
+WATERMARK_NAME = "daily_rollups"
+DAYS_BATCH_SIZE = 100
+
+
+def mark_days_stale(days) -> None:
+    """Refresh rollups of days on the next run, their sessions are gone"""
+    marked_at = timezone.now()
+    StaleRollupDay.objects.bulk_create(
+        [StaleRollupDay(day=day, marked_at=marked_at) for day in set(days)],
+        update_conflicts=True,
+        unique_fields=["day"],
+        update_fields=["marked_at"],
+    )
+
+
+def changed_days(since: datetime | None, until: datetime) -> set[date]:
+    """
+    Days of show sessions whose tickets or fields changed since
+    and days that lost show sessions since
+    """
+    show_sessions = ShowSession.objects.filter(updated_at__lte=until)
+    stale_days = StaleRollupDay.objects.filter(marked_at__lte=until)
+    if since is not None:
+        show_sessions = show_sessions.filter(updated_at__gt=since)
+        stale_days = stale_days.filter(marked_at__gt=since)
+    return set(
+        show_sessions
+        .annotate(day=TruncDate("show_time"))
+        .values_list("day", flat=True)
+        .distinct()
+    ) | set(stale_days.values_list("day", flat=True))
+
+
+def _sessions_of_days(days):
+    day_ranges = [
+        Q(
+            show_time__gte=timezone.make_aware(
+                datetime.combine(day, datetime.min.time())
+            ),
+            show_time__lt=timezone.make_aware(
+                datetime.combine(day + timedelta(days=1), datetime.min.time())
+            ),
+        )
+        for day in days
+    ]
+    return (
+        ShowSession.objects
+        .filter(reduce(or_, day_ranges))
+        .annotate(day=TruncDate("show_time"))
+        .order_by()
+    )
+
+
+def refresh_days(days) -> None:
+    """Recompute the daily rollups of days from sold places of sessions"""
+    days = sorted(days)
+    if not days:
+        return
+
+    show_sessions = _sessions_of_days(days)
+    with transaction.atomic():
+        for model in (
+            DailyDomeOccupancy,
+            DailyShowSales,
+            DailyThemePopularity,
+        ):
+            model.objects.filter(day__in=days).delete()
+
+        DailyDomeOccupancy.objects.bulk_create(
+            DailyDomeOccupancy(**row)
+            for row in show_sessions.values(
+                "day", "planetarium_dome_id"
+            ).annotate(
+                show_sessions=Count("id"),
+                capacity=Sum(
+                    F("planetarium_dome__rows")
+                    * F("planetarium_dome__seats_in_row")
+                ),
+                sold_places=Sum("sold_places"),
+            )
+        )
+        DailyShowSales.objects.bulk_create(
+            DailyShowSales(**row)
+            for row in show_sessions.values(
+                "day", "astronomy_show_id"
+            ).annotate(
+                show_sessions=Count("id"),
+                tickets=Sum("sold_places"),
+            )
+        )
+        DailyThemePopularity.objects.bulk_create(
+            DailyThemePopularity(**row)
+            for row in show_sessions.filter(
+                astronomy_show__show_themes__isnull=False
+            ).values(
+                "day", show_theme_id=F("astronomy_show__show_themes")
+            ).annotate(
+                tickets=Sum("sold_places"),
+            )
+        )
+
+
+def refresh_rollups(
+        full: bool = False,
+        overlap: timedelta = timedelta(minutes=5),
+) -> set[date]:
+    """
+    Refresh rollups of days with sessions changed since the watermark,
+    going back by overlap for transactions that committed late
+    """
+    with transaction.atomic():
+        watermark = (
+            RollupWatermark.objects
+            .select_for_update()
+            .filter(name=WATERMARK_NAME)
+            .first()
+        )
+        until = timezone.now()
+        since = None
+        if watermark is not None and not full:
+            since = watermark.updated_until - overlap
+
+        days = changed_days(since, until)
+        # Marks before the next run's window are never read again
+        StaleRollupDay.objects.filter(
+            marked_at__lte=until - overlap
+        ).delete()
+        if full:
+            for model in (
+                DailyDomeOccupancy,
+                DailyShowSales,
+                DailyThemePopularity,
+            ):
+                model.objects.all().delete()
+        sorted_days = sorted(days)
+        for start in range(0, len(sorted_days), DAYS_BATCH_SIZE):
+            refresh_days(sorted_days[start:start + DAYS_BATCH_SIZE])
+
+        RollupWatermark.objects.update_or_create(
+            name=WATERMARK_NAME,
+            defaults={"updated_until": until},
+        )
+    return days
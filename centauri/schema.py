@@ -0,0 +1,121 @@
+import hashlib
+import json
+from functools import cache
+
+import django
+import drf_spectacular
+import rest_framework
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+# Packages of the project code the schema is generated from
+CODE_PACKAGES = ("planetarium", "centauri", "user")
+
+
+@cache
+def get_code_version() -> str:
+    """Hash of the project code and the packages generating the schema"""
+    digest = hashlib.sha256()
+    for package_version in (
+        django.__version__,
+        rest_framework.__version__,
+        drf_spectacular.__version__,
+    ):
+        digest.update(package_version.encode())
+
+    for package in CODE_PACKAGES:
+        for path in sorted((settings.BASE_DIR / package).rglob("*.py")):
+            relative_path = path.relative_to(settings.BASE_DIR)
+            if "tests" in relative_path.parts:
+                continue
+            digest.update(str(relative_path).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def generate_schema() -> dict:
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def read_schema_file(version: str) -> dict | None:
+    """Schema of the file if it was generated from this code version"""
+    try:
+        with open(settings.OPENAPI_SCHEMA_FILE) as schema_file:
+            data = json.load(schema_file)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != version:
+        return None
+    return data["schema"]
+
+
+def write_schema_file(version: str, schema: dict) -> None:
+    with open(settings.OPENAPI_SCHEMA_FILE, "w") as schema_file:
+        json.dump({"version": version, "schema": schema}, schema_file)
+
+
+@cache
+def get_schema(version: str) -> dict:
+    """
+    Schema of the code version from the schema file, generated and
+    written there on the first call if the file is missing or stale
+    """
+    schema = read_schema_file(version)
+    if schema is None:
+        schema = generate_schema()
+        try:
+            write_schema_file(version, schema)
+        except OSError:
+            # Read-only file systems keep the schema of this process
+            pass
+    return schema
+
+
+@cache
+def render_schema(version: str, renderer_class) -> tuple[bytes, str]:
+    """Schema rendered by renderer_class and its ETag"""
+    content = renderer_class().render(
+        get_schema(version), renderer_class.media_type, {}
+    )
+    return content, quote_etag(hashlib.sha256(content).hexdigest()[:32])
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView that renders the schema once per code version.
+    Clients revalidate it with If-None-Match, other languages and API
+    versions are generated on every request
+    """
+
+    def _get_schema_response(self, request):
+        if (
+            self.api_version
+            or request.version
+            or request.query_params.get("lang")
+            or self._get_version_parameter(request)
+        ):
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        content, etag = render_schema(get_code_version(), type(renderer))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return HttpResponseNotModified(headers=headers)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+        return HttpResponse(
+            content,
+            content_type=content_type,
+            headers={
+                **headers,
+                "Content-Disposition": (
+                    f'inline; filename="{self._get_filename(request, None)}"'
+                ),
+            },
+        )
@@ -1,4 +1,14 @@
-from django.db import transaction
+import base64
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import mul, or_
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
@@ -10,6 +20,20 @@ from centauri.models import (
     ShowSession,
     Ticket,
     Reservation,
+    SeatHold,
+    HeldSeat,
+    DailyDomeOccupancy,
+)
+from centauri.posters import (
+    delete_poster_renditions,
+    generate_poster_renditions,
+    poster_rendition_urls,
+    validate_poster,
+)
+from centauri.values_serializers import (
+    ValuesField,
+    ValuesManyField,
+    ValuesSerializer,
 )
 
 
@@ -34,6 +58,27 @@ class PlanetariumDomeListSerializer(serializers.ModelSerializer):
         fields = ("name", "capacity")
 
 
+PLANETARIUM_DOME_LIST_VALUES = ValuesSerializer(
+    PlanetariumDome,
+    name=ValuesField("name"),
+    capacity=ValuesField("rows", "seats_in_row", to_representation=mul),
+)
+
+
+@extend_schema_field({
+    "type": "object",
+    "description": "URLs of resized posters by size and format",
+    "additionalProperties": {
+        "type": "object",
+        "additionalProperties": {"type": "string", "format": "uri"},
+    },
+})
+class PosterRenditionsField(serializers.ReadOnlyField):
+
+    def to_representation(self, value):
+        return poster_rendition_urls(value)
+
+
 class AstronomyShowSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -42,10 +87,30 @@ class AstronomyShowSerializer(serializers.ModelSerializer):
 
 
 class AstronomyShowPosterSerializer(serializers.ModelSerializer):
+    poster = serializers.FileField(validators=[validate_poster])
+    poster_renditions = PosterRenditionsField()
 
     class Meta:
         model = AstronomyShow
-        fields = ("id", "poster")
+        fields = ("id", "poster", "poster_renditions")
+
+    def update(self, instance, validated_data):
+        poster = validated_data["poster"]
+        previous_renditions = instance.poster_renditions
+        instance.poster.save(poster.name, poster, save=False)
+        try:
+            instance.poster_renditions = generate_poster_renditions(
+                instance.poster.name
+            )
+        except OSError:
+            instance.poster.delete(save=False)
+            raise ValidationError({"poster": ["Upload a valid image."]})
+
+        instance.save(
+            update_fields=["poster", "poster_renditions", "updated_at"]
+        )
+        delete_poster_renditions(previous_renditions)
+        return instance
 
 
 class AstronomyShowListSerializer(serializers.ModelSerializer):
@@ -54,14 +119,30 @@ class AstronomyShowListSerializer(serializers.ModelSerializer):
         read_only=True,
         slug_field="name"
     )
+    poster_renditions = PosterRenditionsField()
 
     class Meta:
         model = AstronomyShow
-        fields = ("id", "title", "show_themes")
+        fields = ("id", "title", "show_themes", "poster_renditions")
+
+
+ASTRONOMY_SHOW_LIST_VALUES = ValuesSerializer(
+    AstronomyShow,
+    id=ValuesField("id"),
+    title=ValuesField("title"),
+    show_themes=ValuesManyField("show_themes", "name"),
+    poster_renditions=ValuesField(
+        "poster_renditions", to_representation=poster_rendition_urls
+    ),
+)
 
 
 class AstronomyShowRetrieveSerializer(AstronomyShowSerializer):
     show_themes = ShowThemeSerializer(many=True)
+    poster_renditions = PosterRenditionsField()
+
+    class Meta(AstronomyShowSerializer.Meta):
+        fields = AstronomyShowSerializer.Meta.fields + ("poster_renditions",)
 
 
 class ShowSessionSerializer(serializers.ModelSerializer):
@@ -99,6 +180,19 @@ class ShowSessionListSerializer(serializers.ModelSerializer):
         )
 
 
+SHOW_SESSION_LIST_VALUES = ValuesSerializer(
+    ShowSession,
+    id=ValuesField("id"),
+    astronomy_show=ValuesField("astronomy_show__title"),
+    planetarium_dome=ValuesField("planetarium_dome__name"),
+    show_time=ValuesField(
+        "show_time",
+        to_representation=serializers.DateTimeField().to_representation,
+    ),
+    available_places=ValuesField("available_places"),
+)
+
+
 class TicketSeatsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
@@ -125,43 +219,452 @@ class ShowSessionRetrieveSerializer(ShowSessionSerializer):
         fields = ("id", "astronomy_show", "planetarium_dome", "taken_places")
 
 
+class ShowSessionSeatMapSerializer(serializers.ModelSerializer):
+    rows = serializers.IntegerField(
+        source="planetarium_dome.rows",
+        read_only=True
+    )
+    seats_in_row = serializers.IntegerField(
+        source="planetarium_dome.seats_in_row",
+        read_only=True
+    )
+    seat_map = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShowSession
+        fields = ("id", "rows", "seats_in_row", "seat_map")
+
+    def get_seat_map(self, show_session) -> str:
+        # Async views fetch the seat map in advance
+        seat_map = self.context.get("seat_map")
+        if seat_map is None:
+            seat_map = show_session.seat_map()
+        return base64.b64encode(seat_map).decode()
+
+
+def _validate_places(places) -> set[tuple[int, int, int]]:
+    """
+    Check that (show_session, row, seat) places fit their domes
+    and are not repeated, return them as (show_session_id, row, seat)
+    """
+    requested_places = set()
+    for show_session, row, seat in places:
+        Ticket.validate_ticket(
+            row,
+            seat,
+            show_session.planetarium_dome,
+            ValidationError
+        )
+        place = (show_session.id, row, seat)
+        if place in requested_places:
+            raise ValidationError(
+                f"Seat {seat} in row {row} is requested more than once."
+            )
+        requested_places.add(place)
+
+    return requested_places
+
+
+def _check_places_are_free(places, user=None) -> None:
+    """
+    Reject (show_session_id, row, seat) places that are sold or held
+    by anyone except the user, with a single statement
+    """
+    places_filter = reduce(or_, (
+        Q(show_session_id=show_session_id, row=row, seat=seat)
+        for show_session_id, row, seat in places
+    ))
+    sold_places = Ticket.objects.filter(
+        places_filter
+    ).values_list("row", "seat")
+    held_places = HeldSeat.objects.filter(
+        places_filter,
+        hold__expires_at__gt=timezone.now(),
+    ).values_list("row", "seat")
+    if user is not None:
+        held_places = held_places.exclude(hold__user=user)
+
+    taken_places = sold_places.union(held_places)[:1]
+    if taken_places:
+        row, seat = taken_places[0]
+        raise ValidationError(f"Seat {seat} in row {row} is already taken.")
+
+
+def _lock_show_sessions(show_session_ids) -> None:
+    """Serialize bookings of the same show sessions on their rows"""
+    list(
+        ShowSession.objects
+        .select_for_update()
+        .filter(id__in=show_session_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def _reserve_seats(reservation_data, tickets_data) -> Reservation:
+    """Create a reservation with tickets, show sessions must be locked"""
+    reservation = Reservation.objects.create(**reservation_data)
+    try:
+        Ticket.objects.bulk_create(
+            Ticket(reservation=reservation, **ticket_data)
+            for ticket_data in tickets_data
+        )
+    except IntegrityError:
+        raise ValidationError(
+            {"tickets": "Some of the seats are already taken."}
+        )
+    ShowSession.update_sold_places(Counter(
+        ticket_data["show_session_id"] for ticket_data in tickets_data
+    ))
+    return reservation
+
+
+def _hold_seats(hold_data, seats_data) -> SeatHold:
+    """
+    Sweep expired holds of the show session and hold seats in it,
+    the show session must be locked
+    """
+    show_session = hold_data["show_session"]
+    now = timezone.now()
+    SeatHold.objects.filter(
+        show_session=show_session,
+        expires_at__lte=now,
+    ).delete()
+    hold = SeatHold.objects.create(
+        expires_at=now + settings.SEAT_HOLD_TTL,
+        **hold_data
+    )
+    HeldSeat.objects.bulk_create(
+        HeldSeat(hold=hold, show_session=show_session, **seat_data)
+        for seat_data in seats_data
+    )
+    return hold
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    show_session = serializers.IntegerField(source="show_session_id")
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "show_session")
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Ticket.objects.all(),
-                fields=["seat", "row", "show_session"]
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    tickets = TicketSerializer(
+        many=True,
+        read_only=False,
+        allow_empty=False,
+        required=False
+    )
+    hold = serializers.PrimaryKeyRelatedField(
+        queryset=SeatHold.objects.prefetch_related("seats"),
+        write_only=True,
+        required=False
+    )
+
+    class Meta:
+        model = Reservation
+        fields = ("id", "created_at", "tickets", "hold")
+
+    def validate_tickets(self, tickets):
+        """Validate all requested seats with a fixed number of queries."""
+        show_sessions = ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).in_bulk({ticket["show_session_id"] for ticket in tickets})
+
+        if any(
+            ticket["show_session_id"] not in show_sessions
+            for ticket in tickets
+        ):
+            raise ValidationError(
+                {"show_session": "Show session does not exist."}
             )
-        ]
 
-    def validate(self, attrs):
-        data = super(TicketSerializer, self).validate(attrs=attrs)
-        Ticket.validate_ticket(
-            attrs["row"],
-            attrs["seat"],
-            attrs["show_session"].planetarium_dome,
-            ValidationError
+        places = _validate_places(
+            (
+                show_sessions[ticket["show_session_id"]],
+                ticket["row"],
+                ticket["seat"],
+            )
+            for ticket in tickets
         )
+        _check_places_are_free(places, self.context["request"].user)
+
+        return tickets
+
+    def validate_hold(self, hold):
+        if hold.user_id != self.context["request"].user.id or hold.is_expired:
+            raise ValidationError("Seat hold does not exist or has expired.")
+        return hold
+
+    def validate(self, attrs):
+        data = super(ReservationSerializer, self).validate(attrs=attrs)
+        if ("tickets" in attrs) == ("hold" in attrs):
+            raise ValidationError("Provide either tickets or a seat hold.")
+
+        hold = attrs.get("hold")
+        if hold:
+            data["tickets"] = [
+                {
+                    "row": held_seat.row,
+                    "seat": held_seat.seat,
+                    "show_session_id": hold.show_session_id,
+                }
+                for held_seat in hold.seats.all()
+            ]
         return data
 
+    def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets")
+        hold = validated_data.pop("hold", None)
+        with transaction.atomic():
+            _lock_show_sessions({
+                ticket_data["show_session_id"] for ticket_data in tickets_data
+            })
+            try:
+                _check_places_are_free(
+                    {
+                        (ticket_data["show_session_id"],
+                         ticket_data["row"],
+                         ticket_data["seat"])
+                        for ticket_data in tickets_data
+                    },
+                    validated_data["user"]
+                )
+            except ValidationError as error:
+                raise ValidationError({"tickets": error.detail})
+
+            reservation = _reserve_seats(validated_data, tickets_data)
+            if hold:
+                hold.delete()
+            return reservation
+
 
-class ReservationSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+class HeldSeatSerializer(serializers.ModelSerializer):
 
     class Meta:
-        model = Reservation
-        fields = ("id", "created_at", "tickets")
+        model = HeldSeat
+        fields = ("row", "seat")
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.select_related("planetarium_dome")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "show_session", "seats", "created_at", "expires_at")
+        read_only_fields = ("expires_at",)
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        places = _validate_places(
+            (attrs["show_session"], seat["row"], seat["seat"])
+            for seat in attrs["seats"]
+        )
+        try:
+            _check_places_are_free(places)
+        except ValidationError as error:
+            raise ValidationError({"seats": error.detail})
+        return data
 
     def create(self, validated_data):
+        seats_data = validated_data.pop("seats")
+        show_session = validated_data["show_session"]
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+            _lock_show_sessions([show_session.id])
+            try:
+                _check_places_are_free({
+                    (show_session.id, seat_data["row"], seat_data["seat"])
+                    for seat_data in seats_data
+                })
+            except ValidationError as error:
+                raise ValidationError({"seats": error.detail})
+
+            return _hold_seats(validated_data, seats_data)
+
+
+class SeatAllocationSerializer(serializers.Serializer):
+    seats = serializers.IntegerField(min_value=1)
+    row_from = serializers.IntegerField(min_value=1, required=False)
+    row_to = serializers.IntegerField(min_value=1, required=False)
+    reserve = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        data = super(SeatAllocationSerializer, self).validate(attrs=attrs)
+        row_from, row_to = attrs.get("row_from"), attrs.get("row_to")
+        if row_from and row_to and row_from > row_to:
+            raise ValidationError("row_from must not be greater than row_to.")
+        return data
+
+    def create(self, validated_data):
+        show_session = validated_data["show_session"]
+        with transaction.atomic():
+            _lock_show_sessions([show_session.id])
+            place = show_session.find_free_places(
+                validated_data["seats"],
+                validated_data.get("row_from", 1),
+                validated_data.get("row_to"),
+            )
+            if place is None:
+                raise ValidationError(
+                    f"There are no {validated_data['seats']} "
+                    f"adjacent free seats."
+                )
+
+            row, first_seat = place
+            seats = range(first_seat, first_seat + validated_data["seats"])
+            if validated_data["reserve"]:
+                return _reserve_seats(
+                    {"user": validated_data["user"]},
+                    [
+                        {
+                            "row": row,
+                            "seat": seat,
+                            "show_session_id": show_session.id,
+                        }
+                        for seat in seats
+                    ]
+                )
+
+            return _hold_seats(
+                {"user": validated_data["user"], "show_session": show_session},
+                [{"row": row, "seat": seat} for seat in seats]
+            )
+
+    def to_representation(self, instance):
+        if isinstance(instance, Reservation):
+            return ReservationSerializer(instance, context=self.context).data
+        return SeatHoldSerializer(instance, context=self.context).data
+
+
+class ShowSessionScheduleSerializer(serializers.Serializer):
+    max_show_sessions = 10_000
+
+    astronomy_show = serializers.PrimaryKeyRelatedField(
+        queryset=AstronomyShow.objects.all()
+    )
+    planetarium_domes = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+    )
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text="Days of week, 0 is Monday",
+    )
+    times = serializers.ListField(
+        child=serializers.TimeField(),
+        allow_empty=False,
+    )
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    skip_conflicts = serializers.BooleanField(
+        default=False,
+        help_text="Schedule the free slots when some are taken",
+    )
+
+    def validate_planetarium_domes(self, value):
+        dome_ids = set(value)
+        unknown_ids = dome_ids - PlanetariumDome.objects.in_bulk(
+            dome_ids
+        ).keys()
+        if unknown_ids:
+            raise ValidationError(
+                f"Unknown planetarium domes: "
+                f"{', '.join(map(str, sorted(unknown_ids)))}."
+            )
+        return sorted(dome_ids)
+
+    def validate(self, attrs):
+        data = super(ShowSessionScheduleSerializer, self).validate(
+            attrs=attrs
+        )
+        if attrs["date_from"] > attrs["date_to"]:
+            raise ValidationError("date_from must not be after date_to.")
+
+        slots = self.get_slots(attrs)
+        if not slots:
+            raise ValidationError("The recurrence rule matches no dates.")
+        if len(slots) > self.max_show_sessions:
+            raise ValidationError(
+                f"At most {self.max_show_sessions} show sessions "
+                f"can be scheduled at once."
+            )
+        data["slots"] = slots
+        return data
+
+    @staticmethod
+    def get_slots(attrs) -> list[tuple[int, datetime]]:
+        """(planetarium dome, show time) pairs of the recurrence rule"""
+        weekdays = set(attrs["weekdays"])
+        times = sorted(set(attrs["times"]))
+        slots = []
+        day = attrs["date_from"]
+        while day <= attrs["date_to"]:
+            if day.weekday() in weekdays:
+                slots.extend(
+                    (dome_id, timezone.make_aware(datetime.combine(day, time)))
+                    for time in times
+                    for dome_id in attrs["planetarium_domes"]
+                )
+            day += timedelta(days=1)
+        return slots
+
+    def slots_representation(self, slots) -> list[dict]:
+        show_time_field = serializers.DateTimeField()
+        return [
+            {
+                "planetarium_dome": dome_id,
+                "show_time": show_time_field.to_representation(show_time),
+            }
+            for dome_id, show_time in slots
+        ]
+
+    def create(self, validated_data):
+        slots = validated_data["slots"]
+        with transaction.atomic():
+            # One range scan of the (show_time, planetarium_dome) index
+            taken_slots = set(
+                ShowSession.objects.filter(
+                    show_time__gte=slots[0][1],
+                    show_time__lte=slots[-1][1],
+                    planetarium_dome_id__in=validated_data[
+                        "planetarium_domes"
+                    ],
+                ).values_list("planetarium_dome_id", "show_time")
+            )
+            conflicts = [slot for slot in slots if slot in taken_slots]
+            if conflicts and not validated_data["skip_conflicts"]:
+                return {"show_sessions": [], "conflicts": conflicts}
+
+            try:
+                show_sessions = ShowSession.objects.bulk_create(
+                    ShowSession(
+                        astronomy_show=validated_data["astronomy_show"],
+                        planetarium_dome_id=dome_id,
+                        show_time=show_time,
+                    )
+                    for dome_id, show_time in slots
+                    if (dome_id, show_time) not in taken_slots
+                )
+            except IntegrityError:
+                raise ValidationError(
+                    "Show sessions were scheduled concurrently "
+                    "in the same slots, try again."
+                )
+
+        return {"show_sessions": show_sessions, "conflicts": conflicts}
+
+    def to_representation(self, instance):
+        return {
+            "show_sessions": ShowSessionSerializer(
+                instance["show_sessions"], many=True
+            ).data,
+            "conflicts": self.slots_representation(instance["conflicts"]),
+        }
 
 
 class TicketListSerializer(TicketSerializer):
@@ -170,3 +673,62 @@ class TicketListSerializer(TicketSerializer):
 
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(read_only=True, many=True)
+
+
+class AnalyticsRangeSerializer(serializers.Serializer):
+    max_days = 366
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+
+    def validate(self, attrs):
+        data = super(AnalyticsRangeSerializer, self).validate(attrs=attrs)
+        days = (attrs["date_to"] - attrs["date_from"]).days + 1
+        if days < 1:
+            raise ValidationError("date_from must not be after date_to.")
+        if days > self.max_days:
+            raise ValidationError(
+                f"The range must not be longer than {self.max_days} days."
+            )
+        return data
+
+
+class DailyDomeOccupancySerializer(serializers.ModelSerializer):
+    planetarium_dome = serializers.CharField(
+        source="planetarium_dome.name",
+        read_only=True
+    )
+    occupancy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DailyDomeOccupancy
+        fields = (
+            "day",
+            "planetarium_dome",
+            "show_sessions",
+            "capacity",
+            "sold_places",
+            "occupancy",
+        )
+
+    def get_occupancy(self, daily_dome_occupancy) -> float:
+        """Share of sold places, from 0 to 1"""
+        if not daily_dome_occupancy.capacity:
+            return 0.0
+        return round(
+            daily_dome_occupancy.sold_places / daily_dome_occupancy.capacity,
+            4
+        )
+
+
+class ShowSalesSerializer(serializers.Serializer):
+    astronomy_show = serializers.IntegerField()
+    title = serializers.CharField()
+    show_sessions = serializers.IntegerField()
+    tickets = serializers.IntegerField()
+
+
+class ThemePopularitySerializer(serializers.Serializer):
+    show_theme = serializers.IntegerField()
+    name = serializers.CharField()
+    tickets = serializers.IntegerField()
@@ -0,0 +1,147 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from centauri.cache import invalidate_catalog_cache
+from centauri.models import (
+    ShowTheme,
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+from centauri.rollups import mark_days_stale
+
+
+def invalidate(model) -> None:
+    # Once for this process right away, once more after commit so that
+    # responses cached before the commit with old rows are dropped too
+    invalidate_catalog_cache(model)
+    transaction.on_commit(lambda: invalidate_catalog_cache(model))
+
+
+@receiver(post_save, sender=ShowTheme)
+@receiver(post_delete, sender=ShowTheme)
+@receiver(post_save, sender=AstronomyShow)
+@receiver(post_delete, sender=AstronomyShow)
+@receiver(post_save, sender=PlanetariumDome)
+@receiver(post_delete, sender=PlanetariumDome)
+@receiver(post_save, sender=ShowSession)
+def invalidate_catalog(sender, **kwargs):
+    invalidate(sender)
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_themes.through)
+def invalidate_astronomy_show_themes(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate(AstronomyShow)
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_themes.through)
+def touch_astronomy_shows_of_themes(
+        sender, action, instance, reverse, pk_set, **kwargs
+):
+    # Themes are part of show session ETags through the show update time,
+    # cleared themes are only known before they are cleared
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        astronomy_shows = AstronomyShow.objects.filter(pk=instance.pk)
+    elif pk_set is not None:
+        astronomy_shows = AstronomyShow.objects.filter(pk__in=pk_set)
+    else:
+        astronomy_shows = AstronomyShow.objects.filter(show_themes=instance)
+    astronomy_shows.update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=ShowTheme)
+def touch_astronomy_shows_of_deleted_theme(sender, instance, **kwargs):
+    AstronomyShow.objects.filter(show_themes=instance).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=ShowSession)
+def mark_previous_show_session_day(
+        sender, instance, update_fields=None, **kwargs
+):
+    # The rollups of the new day follow updated_at, the old day is lost
+    if instance.pk is None or (
+            update_fields is not None and "show_time" not in update_fields
+    ):
+        return
+    previous_show_time = (
+        ShowSession.objects
+        .filter(pk=instance.pk)
+        .values_list("show_time", flat=True)
+        .first()
+    )
+    if previous_show_time is not None and (
+            timezone.localdate(previous_show_time)
+            != timezone.localdate(instance.show_time)
+    ):
+        mark_days_stale([timezone.localdate(previous_show_time)])
+
+
+@receiver(post_delete, sender=ShowSession)
+def mark_deleted_show_session_day(sender, instance, **kwargs):
+    mark_days_stale([timezone.localdate(instance.show_time)])
+
+
+# Reservations and bulk_create() of the API adjust sold places themselves,
+# tickets written one by one, e.g. by the admin, are counted here
+
+
+@receiver(pre_save, sender=Ticket)
+def move_ticket_sold_place(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    previous_show_session_id = (
+        Ticket.objects
+        .filter(pk=instance.pk)
+        .values_list("show_session_id", flat=True)
+        .first()
+    )
+    if previous_show_session_id not in (None, instance.show_session_id):
+        ShowSession.update_sold_places({
+            previous_show_session_id: -1,
+            instance.show_session_id: 1,
+        })
+
+
+@receiver(post_save, sender=Ticket)
+def count_created_ticket(sender, instance, created, **kwargs):
+    if created:
+        ShowSession.update_sold_places({instance.show_session_id: 1})
+
+
+@receiver(post_delete, sender=Ticket)
+def uncount_deleted_ticket(sender, instance, origin=None, **kwargs):
+    # Tickets deleted with their reservation are uncounted at once by
+    # uncount_reservation_tickets(), those of sessions need no count
+    if isinstance(origin, Ticket) or (
+            isinstance(origin, QuerySet) and origin.model is Ticket
+    ):
+        ShowSession.update_sold_places({instance.show_session_id: -1})
+
+
+@receiver(pre_delete, sender=Reservation)
+def uncount_reservation_tickets(sender, instance, **kwargs):
+    sold_places = Counter(
+        instance.tickets.values_list("show_session_id", flat=True)
+    )
+    ShowSession.update_sold_places({
+        show_session_id: -count
+        for show_session_id, count in sold_places.items()
+    })
@@ -0,0 +1,101 @@
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from rest_framework import status
+from rest_framework.serializers import Serializer
+
+from centauri.cache import CATALOG_CACHE
+
+VIEW = "(view)"
+
+
+def field_path(field) -> str:
+    names = []
+    while field.parent is not None:
+        if field.field_name:
+            names.append(field.field_name)
+        field = field.parent
+    return ".".join(reversed(names))
+
+
+@contextmanager
+def count_field_queries():
+    """
+    Count executed queries per path of the serializer field that
+    triggered them, queries outside of serializer fields count as VIEW
+    """
+    queries = Counter()
+    fields_stack = []
+    readable_fields = Serializer._readable_fields.fget
+
+    def track(field, method):
+        def tracked_method(*args, **kwargs):
+            fields_stack.append(field_path(field))
+            try:
+                return method(*args, **kwargs)
+            finally:
+                fields_stack.pop()
+        return tracked_method
+
+    def tracked_readable_fields(serializer):
+        for field in readable_fields(serializer):
+            if not getattr(field, "_is_query_tracked", False):
+                field.get_attribute = track(field, field.get_attribute)
+                field.to_representation = track(
+                    field, field.to_representation
+                )
+                field._is_query_tracked = True
+            yield field
+
+    def count_query(execute, sql, params, many, context):
+        queries[fields_stack[-1] if fields_stack else VIEW] += 1
+        return execute(sql, params, many, context)
+
+    with (
+        mock.patch.object(
+            Serializer,
+            "_readable_fields",
+            property(tracked_readable_fields),
+        ),
+        connection.execute_wrapper(count_query),
+    ):
+        yield queries
+
+
+class QueryBudgetMixin:
+    def assertQueriesDoNotGrow(self, url, add_rows, budget, rows=(1, 100)):
+        """
+        Request url while add_rows grows related rows to each count of rows,
+        assert the queries stay constant and within budget
+        """
+        measured = []
+        created_rows = 0
+        for rows_count in rows:
+            add_rows(rows_count - created_rows)
+            created_rows = rows_count
+            # Budgets are for building responses, not for cache hits
+            caches[CATALOG_CACHE].clear()
+            with count_field_queries() as queries:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            measured.append(queries)
+
+        first, last = measured[0], measured[-1]
+        grown_fields = [
+            f"{path}: {first[path]} -> {last[path]}"
+            for path in last
+            if last[path] > first[path]
+        ]
+        self.assertFalse(
+            grown_fields,
+            f"Queries of {url} grow with {rows[0]} -> {rows[-1]} rows in "
+            + ", ".join(grown_fields)
+        )
+        self.assertLessEqual(
+            sum(last.values()),
+            budget,
+            f"Queries of {url} exceed budget: {dict(last)}"
+        )
@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri.models import (
+    AstronomyShow,
+    DailyShowSales,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+from centauri.rollups import refresh_rollups
+
+OCCUPANCY_URL = reverse("centauri:analytics-occupancy")
+SHOW_SALES_URL = reverse("centauri:analytics-show-sales")
+THEME_POPULARITY_URL = reverse("centauri:analytics-theme-popularity")
+RANGE = {"date_from": "2025-06-01", "date_to": "2025-06-30"}
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.test",
+            password="adminpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.planetarium_dome = PlanetariumDome.objects.create(
+            name="Test name",
+            rows=10,
+            seats_in_row=10,
+        )
+        self.astronomy_show = AstronomyShow.objects.create(title="Test title")
+        self.astronomy_show.show_themes.add(
+            ShowTheme.objects.create(name="Galaxies")
+        )
+        self.show_sessions = [
+            ShowSession.objects.create(
+                astronomy_show=self.astronomy_show,
+                planetarium_dome=self.planetarium_dome,
+                show_time=timezone.make_aware(datetime(2025, 6, day, hour)),
+            )
+            for day, hour in ((8, 12), (8, 18), (9, 12))
+        ]
+        ShowSession.update_sold_places({
+            show_session.id: sold_places
+            for show_session, sold_places in zip(
+                self.show_sessions, (5, 10, 25)
+            )
+        })
+        call_command("refresh_rollups", stdout=StringIO())
+
+    def test_occupancy(self):
+        res = self.client.get(OCCUPANCY_URL, RANGE)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                (row["day"], row["show_sessions"], row["occupancy"])
+                for row in res.data
+            ],
+            [("2025-06-08", 2, 0.075), ("2025-06-09", 1, 0.25)]
+        )
+
+    def test_show_sales_and_theme_popularity(self):
+        show_sales_res = self.client.get(SHOW_SALES_URL, RANGE)
+        theme_popularity_res = self.client.get(
+            THEME_POPULARITY_URL,
+            {"date_from": "2025-06-09", "date_to": "2025-06-09"},
+        )
+
+        self.assertEqual(
+            show_sales_res.data,
+            [
+                {
+                    "astronomy_show": self.astronomy_show.id,
+                    "title": "Test title",
+                    "show_sessions": 3,
+                    "tickets": 40,
+                }
+            ]
+        )
+        self.assertEqual(
+            [
+                (row["name"], row["tickets"])
+                for row in theme_popularity_res.data
+            ],
+            [("Galaxies", 25)]
+        )
+
+    def test_refresh_processes_only_changed_days(self):
+        ShowSession.update_sold_places({self.show_sessions[2].id: 1})
+
+        days = refresh_rollups(overlap=timedelta(0))
+
+        self.assertEqual(days, {date(2025, 6, 9)})
+        self.assertEqual(
+            DailyShowSales.objects.get(day=date(2025, 6, 9)).tickets, 26
+        )
+
+    def test_refresh_processes_days_of_deleted_show_sessions(self):
+        self.show_sessions[2].delete()
+
+        days = refresh_rollups(overlap=timedelta(0))
+
+        self.assertEqual(days, {date(2025, 6, 9)})
+        self.assertFalse(
+            DailyShowSales.objects.filter(day=date(2025, 6, 9)).exists()
+        )
+
+    def test_refresh_processes_previous_days_of_moved_show_sessions(self):
+        show_session = self.show_sessions[2]
+        show_session.refresh_from_db()
+        show_session.show_time = timezone.make_aware(datetime(2025, 6, 10, 12))
+        show_session.save()
+
+        days = refresh_rollups(overlap=timedelta(0))
+
+        self.assertEqual(days, {date(2025, 6, 9), date(2025, 6, 10)})
+        self.assertEqual(
+            list(
+                DailyShowSales.objects
+                .order_by("day")
+                .values_list("day", "tickets")
+            ),
+            [(date(2025, 6, 8), 15), (date(2025, 6, 10), 25)],
+        )
+
+    def test_invalid_range(self):
+        res = self.client.get(
+            OCCUPANCY_URL,
+            {"date_from": "2025-06-30", "date_to": "2025-06-01"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_analytics_staff_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.test",
+                password="testpassword",
+            )
+        )
+
+        res = self.client.get(OCCUPANCY_URL, RANGE)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
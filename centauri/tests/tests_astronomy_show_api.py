@@ -2,13 +2,24 @@ import tempfile
 import os
 
 from PIL import Image
+from django.core.files.storage import default_storage
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework.reverse import reverse
 
-from centauri.models import AstronomyShow, ShowTheme
+from centauri.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+from centauri.posters import (
+    POSTER_RENDITION_SIZES,
+    delete_poster_renditions,
+)
 from centauri.serializers import AstronomyShowListSerializer
 
 ASTRONOMY_SHOW_URL = reverse("centauri:astronomyshow-list")
@@ -101,6 +112,65 @@ class AuthenticatedAstronomyShowTests(TestCase):
         self.assertIn(serializer_2.data, res.data["results"])
         self.assertNotIn(serializer_3.data, res.data["results"])
 
+    def test_filter_astronomy_show_by_theme_id(self):
+        astronomy_show = sample_astronomy_show()
+        astronomy_show_2 = AstronomyShow.objects.create(
+            title="Test second title",
+        )
+        show_theme = astronomy_show.show_themes.first()
+
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"theme_id": show_theme.id})
+
+        serializer = AstronomyShowListSerializer(astronomy_show)
+        serializer_2 = AstronomyShowListSerializer(astronomy_show_2)
+
+        self.assertEqual(res.data["results"], [serializer.data])
+        self.assertNotIn(serializer_2.data, res.data["results"])
+
+    def test_filter_astronomy_show_by_invalid_theme_id(self):
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"theme_id": "galaxies"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("theme_id", res.data)
+
+    def test_search_astronomy_shows(self):
+        black_holes = AstronomyShow.objects.create(
+            title="Journey into black holes",
+            description="Event horizons and spaghettification",
+        )
+        sun = AstronomyShow.objects.create(
+            title="Our Sun",
+            description="Flares and the birth of black holes",
+        )
+        nebulae = AstronomyShow.objects.create(
+            title="Nebulae",
+            description="Clouds of gas and dust",
+        )
+        nebulae.show_themes.add(ShowTheme.objects.create(name="Galaxies"))
+
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"search": "black hole"})
+        theme_res = self.client.get(ASTRONOMY_SHOW_URL, {"search": "galaxy"})
+        typo_res = self.client.get(ASTRONOMY_SHOW_URL, {"search": "Nebula"})
+
+        self.assertEqual(
+            [astronomy_show["id"] for astronomy_show in res.data["results"]],
+            [black_holes.id, sun.id]
+        )
+        self.assertEqual(
+            [
+                astronomy_show["id"]
+                for astronomy_show in theme_res.data["results"]
+            ],
+            [nebulae.id]
+        )
+        self.assertEqual(
+            [
+                astronomy_show["id"]
+                for astronomy_show in typo_res.data["results"]
+            ],
+            [nebulae.id]
+        )
+
 
 class AstronomyShowImageUploadTests(TestCase):
     def setUp(self):
@@ -112,7 +182,18 @@ class AstronomyShowImageUploadTests(TestCase):
         self.astronomy_show = sample_astronomy_show()
 
     def tearDown(self):
+        self.astronomy_show.refresh_from_db()
         self.astronomy_show.poster.delete()
+        delete_poster_renditions(self.astronomy_show.poster_renditions)
+
+    def upload_poster(self, image_format, size):
+        url = image_upload_url(self.astronomy_show.id)
+        with tempfile.NamedTemporaryFile(suffix=".img") as ntf:
+            Image.new("RGB", size, "navy").save(ntf, format=image_format)
+            ntf.seek(0)
+            return self.client.post(
+                url, {"poster": ntf}, format="multipart"
+            )
 
     def test_upload_poster_to_astronomy_show(self):
         url = image_upload_url(self.astronomy_show.id)
@@ -126,3 +207,83 @@ class AstronomyShowImageUploadTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn("poster", res.data)
         self.assertTrue(os.path.exists(self.astronomy_show.poster.path))
+
+    def test_upload_poster_generates_renditions(self):
+        res = self.upload_poster("PNG", (2000, 1000))
+        self.astronomy_show.refresh_from_db()
+        renditions = self.astronomy_show.poster_renditions
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data["poster_renditions"]), [
+            "thumbnail", "medium", "large"
+        ])
+        for size_name, (width, height) in POSTER_RENDITION_SIZES.items():
+            for extension, image_format in (("webp", "WEBP"), ("jpg", "JPEG")):
+                with (
+                    default_storage.open(renditions[size_name][extension])
+                    as rendition,
+                    Image.open(rendition) as image,
+                ):
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.width, width)
+                    self.assertLessEqual(image.height, height)
+
+    def test_poster_renditions_in_list_and_retrieve(self):
+        self.upload_poster("JPEG", (300, 450))
+        self.astronomy_show.refresh_from_db()
+        thumbnail_url = default_storage.url(
+            self.astronomy_show.poster_renditions["thumbnail"]["webp"]
+        )
+
+        list_res = self.client.get(ASTRONOMY_SHOW_URL)
+        retrieve_res = self.client.get(
+            reverse(
+                "centauri:astronomyshow-detail",
+                args=[self.astronomy_show.id]
+            )
+        )
+
+        self.assertEqual(
+            list_res.data["results"][0]["poster_renditions"]["thumbnail"],
+            {"webp": thumbnail_url, "jpg": thumbnail_url[:-4] + "jpg"}
+        )
+        self.assertEqual(
+            retrieve_res.data["poster_renditions"],
+            list_res.data["results"][0]["poster_renditions"]
+        )
+
+    def test_upload_poster_changes_show_session_etag(self):
+        show_session = ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=PlanetariumDome.objects.create(
+                name="Test dome", rows=10, seats_in_row=10
+            ),
+            show_time=timezone.now(),
+        )
+        url = reverse(
+            "centauri:showsession-detail", args=[show_session.id]
+        )
+        etag = self.client.get(url)["ETag"]
+
+        self.upload_poster("JPEG", (300, 450))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_upload_invalid_poster(self):
+        url = image_upload_url(self.astronomy_show.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            ntf.write(b"not an image")
+            ntf.seek(0)
+            invalid_res = self.client.post(
+                url, {"poster": ntf}, format="multipart"
+            )
+        gif_res = self.upload_poster("GIF", (10, 10))
+        self.astronomy_show.refresh_from_db()
+
+        self.assertEqual(
+            invalid_res.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(gif_res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.astronomy_show.poster)
@@ -0,0 +1,318 @@
+import asyncio
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri import async_views, exports
+from centauri.cache import CATALOG_CACHE
+from centauri.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from user.serializers import UserClaimsTokenObtainPairSerializer
+
+ASYNC_SHOW_SESSION_URL = reverse("centauri:async-showsession-list")
+ASYNC_ASTRONOMY_SHOW_URL = reverse("centauri:async-astronomyshow-list")
+
+
+def async_detail_url(show_session_id):
+    return reverse(
+        "centauri:async-showsession-detail", args=(show_session_id,)
+    )
+
+
+def async_seat_map_url(show_session_id):
+    return reverse(
+        "centauri:async-showsession-seat-map", args=(show_session_id,)
+    )
+
+
+class AsyncViewsMixin:
+    def setUp(self):
+        caches[CATALOG_CACHE].clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="testpassword",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.headers = {
+            "authorization": "Bearer " + str(
+                UserClaimsTokenObtainPairSerializer
+                .get_token(self.user)
+                .access_token
+            )
+        }
+        self.planetarium_dome = PlanetariumDome.objects.create(
+            name="Test name",
+            rows=10,
+            seats_in_row=10,
+        )
+        self.astronomy_show = AstronomyShow.objects.create(
+            title="Black holes",
+            description="Test description",
+        )
+        self.astronomy_show.show_themes.add(
+            ShowTheme.objects.create(name="Galaxies")
+        )
+        self.show_sessions = [
+            ShowSession.objects.create(
+                astronomy_show=self.astronomy_show,
+                planetarium_dome=self.planetarium_dome,
+                show_time=timezone.now() + timedelta(days=1, hours=hours),
+            )
+            for hours in range(3)
+        ]
+        self.show_session = self.show_sessions[0]
+        self.reservation = Reservation.objects.create(user=self.user)
+        self.sell_seat(1)
+
+    def sell_seat(self, seat):
+        Ticket.objects.create(
+            reservation=self.reservation,
+            show_session=self.show_session,
+            row=2,
+            seat=seat,
+        )
+
+
+class AsyncViewsTests(AsyncViewsMixin, TestCase):
+    async def test_auth_required(self):
+        res = await self.async_client.get(ASYNC_SHOW_SESSION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_show_session_list_matches_sync_list(self):
+        params = {"limit": 2}
+        res = await self.async_client.get(
+            ASYNC_SHOW_SESSION_URL, params, headers=self.headers
+        )
+        next_res = await self.async_client.get(
+            res.json()["next"], headers=self.headers
+        )
+        sync_res = await sync_to_async(self.client.get)(
+            reverse("centauri:showsession-list"), params
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], sync_res.json()["results"])
+        self.assertEqual(
+            [
+                show_session["id"]
+                for show_session in next_res.json()["results"]
+            ],
+            [self.show_sessions[2].id]
+        )
+
+    async def test_astronomy_show_list_matches_sync_list(self):
+        params = {"search": "black holes"}
+        res = await self.async_client.get(
+            ASYNC_ASTRONOMY_SHOW_URL, params, headers=self.headers
+        )
+        cached_res = await self.async_client.get(
+            ASYNC_ASTRONOMY_SHOW_URL, params, headers=self.headers
+        )
+        sync_res = await sync_to_async(self.client.get)(
+            reverse("centauri:astronomyshow-list"), params
+        )
+
+        self.assertEqual(res.json()["count"], 1)
+        self.assertEqual(res.json()["results"], sync_res.json()["results"])
+        self.assertEqual(cached_res.content, res.content)
+
+    async def test_show_session_detail_and_seat_map_match_sync(self):
+        responses = []
+        for async_url, url in (
+            (
+                async_detail_url(self.show_session.id),
+                reverse(
+                    "centauri:showsession-detail",
+                    args=(self.show_session.id,)
+                ),
+            ),
+            (
+                async_seat_map_url(self.show_session.id),
+                reverse(
+                    "centauri:showsession-seat-map",
+                    args=(self.show_session.id,)
+                ),
+            ),
+        ):
+            res = await self.async_client.get(async_url, headers=self.headers)
+            sync_res = await sync_to_async(self.client.get)(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json(), sync_res.json())
+            responses.append((res, sync_res))
+
+        detail_res, sync_detail_res = responses[0]
+        self.assertEqual(detail_res["ETag"], sync_detail_res["ETag"])
+
+    async def test_show_session_not_modified(self):
+        url = async_detail_url(self.show_session.id)
+        res = await self.async_client.get(url, headers=self.headers)
+
+        not_modified_res = await self.async_client.get(
+            url, headers={**self.headers, "if-none-match": res["ETag"]}
+        )
+        await sync_to_async(self.sell_seat)(2)
+        changed_res = await self.async_client.get(
+            url, headers={**self.headers, "if-none-match": res["ETag"]}
+        )
+
+        self.assertEqual(
+            not_modified_res.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(changed_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(changed_res.json()["taken_places"]), 2)
+
+    async def test_invalid_wait_and_missing_show_session(self):
+        invalid_res = await self.async_client.get(
+            async_seat_map_url(self.show_session.id),
+            {"wait": 600},
+            headers=self.headers,
+        )
+        missing_res = await self.async_client.get(
+            async_seat_map_url(0), headers=self.headers
+        )
+
+        self.assertEqual(
+            invalid_res.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(missing_res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@mock.patch.object(async_views, "LONG_POLL_INTERVAL", 0.05)
+class LongPollTests(AsyncViewsMixin, TransactionTestCase):
+    async def get_etag(self, url):
+        res = await self.async_client.get(url, headers=self.headers)
+        return res["ETag"]
+
+    async def test_long_poll_returns_when_show_session_changes(self):
+        url = async_seat_map_url(self.show_session.id)
+        etag = await self.get_etag(url)
+        started = time.perf_counter()
+
+        long_polls = [
+            asyncio.create_task(self.async_client.get(
+                url,
+                {"wait": 10},
+                headers={**self.headers, "if-none-match": etag},
+            ))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.2)
+        await sync_to_async(self.sell_seat)(2)
+        responses = await asyncio.gather(*long_polls)
+
+        self.assertLess(time.perf_counter() - started, 5)
+        for res in responses:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res["ETag"], etag)
+
+    async def test_long_poll_times_out_not_modified(self):
+        url = async_detail_url(self.show_session.id)
+        etag = await self.get_etag(url)
+
+        res = await self.async_client.get(
+            url,
+            {"wait": 1},
+            headers={**self.headers, "if-none-match": etag},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(async_views.get_version_watcher().waiters)
+
+
+@mock.patch.object(exports, "EXPORT_CHUNK_SIZE", 1)
+class AsgiExportTests(AsyncViewsMixin, TransactionTestCase):
+    async def asgi_get(self, path, headers, send):
+        """GET path through the ASGI handler, messages go to send"""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver")] + [
+                (name.encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+        disconnected = asyncio.Event()
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        await ASGIHandler()(scope, receive, send)
+        disconnected.set()
+
+    async def test_export_is_streamed_in_batches(self):
+        await sync_to_async(self.sell_seat)(2)
+        admin = await get_user_model().objects.acreate(
+            email="admin@admin.test",
+            is_staff=True,
+        )
+        format_rows = exports.CSVExportRenderer.format_rows
+        formatted_batches = []
+        # Body messages with the batches formatted before they were sent
+        bodies = []
+
+        def count_format_rows(renderer, columns, rows):
+            formatted_batches.append(rows)
+            return format_rows(renderer, columns, rows)
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.assertEqual(message["status"], status.HTTP_200_OK)
+            elif message.get("body"):
+                bodies.append((message["body"], len(formatted_batches)))
+
+        with mock.patch.object(
+            exports.CSVExportRenderer, "format_rows", count_format_rows
+        ):
+            await self.asgi_get(
+                reverse("centauri:reservation-export"),
+                {
+                    "authorization": "Bearer " + str(
+                        UserClaimsTokenObtainPairSerializer
+                        .get_token(admin)
+                        .access_token
+                    )
+                },
+                send,
+            )
+
+        self.assertEqual([batches for _, batches in bodies], [0, 1, 2])
+        self.assertEqual(
+            [
+                line.split(b",")[-2:]
+                for line in b"".join(body for body, _ in bodies).splitlines()
+            ],
+            [[b"row", b"seat"], [b"2", b"1"], [b"2", b"2"]],
+        )
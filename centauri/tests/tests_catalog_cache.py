@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri.cache import CATALOG_CACHE
+from centauri.models import AstronomyShow, PlanetariumDome, ShowTheme
+
+ASTRONOMY_SHOW_URL = reverse("centauri:astronomyshow-list")
+PLANETARIUM_DOME_URL = reverse("centauri:planetariumdome-list")
+CATALOG_CACHE_STATS_URL = reverse("centauri:catalog-cache-stats")
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        caches[CATALOG_CACHE].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.test",
+            password="adminpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.astronomy_show = AstronomyShow.objects.create(
+            title="Test title",
+            description="Test description",
+        )
+
+    def test_repeated_list_is_served_from_cache(self):
+        res = self.client.get(ASTRONOMY_SHOW_URL)
+
+        with self.assertNumQueries(0):
+            cached_res = self.client.get(ASTRONOMY_SHOW_URL)
+
+        self.assertEqual(cached_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_res.data, res.data)
+
+    def test_query_string_is_part_of_cache_key(self):
+        AstronomyShow.objects.create(title="Second title")
+
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"search": "second"})
+        all_res = self.client.get(ASTRONOMY_SHOW_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(len(all_res.data["results"]), 2)
+
+    def test_create_invalidates_cached_list(self):
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                PLANETARIUM_DOME_URL,
+                {"name": "Test dome", "rows": 10, "seats_in_row": 10},
+            )
+        res = self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(
+            [dome["name"] for dome in res.data["results"]], ["Test dome"]
+        )
+
+    def test_show_themes_change_invalidates_cached_show(self):
+        url = reverse(
+            "centauri:astronomyshow-detail", args=(self.astronomy_show.id,)
+        )
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.astronomy_show.show_themes.add(
+                ShowTheme.objects.create(name="Galaxies")
+            )
+        res = self.client.get(url)
+
+        self.assertEqual(
+            [theme["name"] for theme in res.data["show_themes"]],
+            ["Galaxies"]
+        )
+
+    def test_cache_stats(self):
+        PlanetariumDome.objects.create(name="Test", rows=1, seats_in_row=1)
+        self.client.get(PLANETARIUM_DOME_URL)
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        res = self.client.get(CATALOG_CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"hits": 1, "misses": 1})
+
+    def test_cache_stats_staff_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.test",
+                password="testpassword",
+            )
+        )
+
+        res = self.client.get(CATALOG_CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,98 @@
+import json
+import pathlib
+import tempfile
+
+from django.test import TestCase, override_settings
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from centauri import schema
+
+SCHEMA_URL = reverse("schema")
+
+
+class CachedOpenApiSchemaTests(TestCase):
+    def setUp(self):
+        schema.get_schema.cache_clear()
+        schema.render_schema.cache_clear()
+        self.addCleanup(schema.get_schema.cache_clear)
+        self.addCleanup(schema.render_schema.cache_clear)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_file = pathlib.Path(directory.name) / "schema.json"
+        settings_override = override_settings(
+            OPENAPI_SCHEMA_FILE=str(self.schema_file)
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+
+    def test_schema_matches_generated_schema(self):
+        for params in ({}, {"format": "json"}):
+            res = self.client.get(SCHEMA_URL, params)
+            live_res = SpectacularAPIView.as_view()(
+                APIRequestFactory().get(SCHEMA_URL, params)
+            )
+            live_res.render()
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res["Content-Type"], live_res["Content-Type"])
+            self.assertEqual(res.content, live_res.content)
+
+    def test_schema_is_written_to_file_of_code_version(self):
+        res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        data = json.loads(self.schema_file.read_text())
+        self.assertEqual(data["version"], schema.get_code_version())
+        self.assertEqual(data["schema"], json.loads(res.content))
+
+    def test_schema_file_of_code_version_is_served(self):
+        file_schema = {"openapi": "3.0.3", "info": {"title": "From file"}}
+        self.schema_file.write_text(json.dumps({
+            "version": schema.get_code_version(),
+            "schema": file_schema,
+        }))
+
+        res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(json.loads(res.content), file_schema)
+
+    def test_stale_schema_file_is_regenerated(self):
+        self.schema_file.write_text(json.dumps({
+            "version": "stale",
+            "schema": {"info": {"title": "Stale"}},
+        }))
+
+        res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(
+            json.loads(res.content)["info"]["title"], "Planetarium API"
+        )
+        self.assertEqual(
+            json.loads(self.schema_file.read_text())["version"],
+            schema.get_code_version(),
+        )
+
+    def test_not_modified_with_etag(self):
+        res = self.client.get(SCHEMA_URL)
+        json_res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        not_modified_res = self.client.get(
+            SCHEMA_URL, headers={"if-none-match": res["ETag"]}
+        )
+        other_format_res = self.client.get(
+            SCHEMA_URL,
+            {"format": "json"},
+            headers={"if-none-match": res["ETag"]},
+        )
+
+        self.assertNotEqual(res["ETag"], json_res["ETag"])
+        self.assertEqual(
+            not_modified_res.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(not_modified_res["ETag"], res["ETag"])
+        self.assertEqual(other_format_res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,189 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri.models import (
+    AstronomyShow,
+    HeldSeat,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from centauri.tests.query_budget import QueryBudgetMixin
+
+
+def list_url(basename):
+    return reverse(f"centauri:{basename}-list") + "?limit=100"
+
+
+def detail_url(basename, pk, action="detail"):
+    return reverse(f"centauri:{basename}-{action}", args=(pk,))
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.planetarium_dome = PlanetariumDome.objects.create(
+            name="Test name",
+            rows=20,
+            seats_in_row=25,
+        )
+        self.astronomy_show = AstronomyShow.objects.create(
+            title="Test title",
+            description="Test description",
+        )
+        self.show_time = timezone.now() + timedelta(days=1)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=self.planetarium_dome,
+            show_time=self.show_time,
+        )
+
+    def add_show_themes(self, count):
+        start = ShowTheme.objects.count()
+        self.astronomy_show.show_themes.add(*ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"Theme {index}")
+            for index in range(start, start + count)
+        ))
+
+    def add_astronomy_shows(self, count):
+        start = AstronomyShow.objects.count()
+        for astronomy_show in AstronomyShow.objects.bulk_create(
+            AstronomyShow(title=f"Show {index}")
+            for index in range(start, start + count)
+        ):
+            astronomy_show.show_themes.add(
+                ShowTheme.objects.create(name=f"Theme of {astronomy_show}")
+            )
+
+    def add_planetarium_domes(self, count):
+        start = PlanetariumDome.objects.count()
+        PlanetariumDome.objects.bulk_create(
+            PlanetariumDome(name=f"Dome {index}", rows=10, seats_in_row=10)
+            for index in range(start, start + count)
+        )
+
+    def add_show_sessions(self, count):
+        start = ShowSession.objects.count()
+        for index in range(start, start + count):
+            ShowSession.objects.create(
+                astronomy_show=AstronomyShow.objects.create(
+                    title=f"Show {index}"
+                ),
+                planetarium_dome=PlanetariumDome.objects.create(
+                    name=f"Dome {index}", rows=10, seats_in_row=10
+                ),
+                show_time=self.show_time + timedelta(hours=index),
+            )
+
+    def add_tickets(self, count, reservation=None):
+        reservation = reservation or Reservation.objects.create(
+            user=self.user
+        )
+        start = Ticket.objects.count()
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=index // 25 + 1,
+                seat=index % 25 + 1,
+                show_session=self.show_session,
+                reservation=reservation,
+            )
+            for index in range(start, start + count)
+        )
+
+    def add_reservations(self, count):
+        for _ in range(count):
+            self.add_show_sessions(1)
+            reservation = Reservation.objects.create(user=self.user)
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                show_session=ShowSession.objects.latest("id"),
+                reservation=reservation,
+            )
+            self.add_tickets(1, reservation)
+
+    def add_seat_holds(self, count):
+        for _ in range(count):
+            hold = SeatHold.objects.create(
+                show_session=self.show_session,
+                user=self.user,
+                expires_at=timezone.now() + timedelta(minutes=10),
+            )
+            HeldSeat.objects.create(
+                row=20,
+                seat=SeatHold.objects.count(),
+                show_session=self.show_session,
+                hold=hold,
+            )
+
+    def test_show_themes_list(self):
+        self.assertQueriesDoNotGrow(
+            list_url("showtheme"), self.add_show_themes, budget=2
+        )
+
+    def test_planetarium_domes_list(self):
+        self.assertQueriesDoNotGrow(
+            list_url("planetariumdome"), self.add_planetarium_domes, budget=2
+        )
+
+    def test_astronomy_shows_list(self):
+        self.assertQueriesDoNotGrow(
+            list_url("astronomyshow"), self.add_astronomy_shows, budget=3
+        )
+
+    def test_astronomy_shows_retrieve(self):
+        self.assertQueriesDoNotGrow(
+            detail_url("astronomyshow", self.astronomy_show.id),
+            self.add_show_themes,
+            budget=2,
+        )
+
+    def test_show_sessions_list(self):
+        self.assertQueriesDoNotGrow(
+            list_url("showsession"), self.add_show_sessions, budget=2
+        )
+
+    def test_show_sessions_retrieve(self):
+        self.assertQueriesDoNotGrow(
+            detail_url("showsession", self.show_session.id),
+            self.add_tickets,
+            budget=3,
+        )
+
+    def test_show_sessions_seat_map(self):
+        self.assertQueriesDoNotGrow(
+            detail_url("showsession", self.show_session.id, "seat-map"),
+            self.add_tickets,
+            budget=2,
+        )
+
+    def test_reservations_list(self):
+        self.assertQueriesDoNotGrow(
+            list_url("reservation"), self.add_reservations, budget=3
+        )
+
+    def test_reservations_retrieve(self):
+        reservation = Reservation.objects.create(user=self.user)
+        self.assertQueriesDoNotGrow(
+            detail_url("reservation", reservation.id),
+            lambda count: self.add_tickets(count, reservation),
+            budget=2,
+        )
+
+    def test_seat_holds_list(self):
+        self.assertQueriesDoNotGrow(
+            list_url("seathold"), self.add_seat_holds, budget=3
+        )
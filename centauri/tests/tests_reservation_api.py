@@ -0,0 +1,339 @@
+import csv
+import json
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+
+RESERVATION_URL = reverse("centauri:reservation-list")
+RESERVATION_EXPORT_URL = reverse("centauri:reservation-export")
+
+
+def detail_url(reservation_id):
+    return reverse("centauri:reservation-detail", args=(reservation_id,))
+
+
+def sample_show_session(**params) -> ShowSession:
+    planetarium_dome = PlanetariumDome.objects.create(
+        name="Test name",
+        rows=20,
+        seats_in_row=25,
+    )
+    astronomy_show = AstronomyShow.objects.create(
+        title="Test title",
+        description="Test description",
+    )
+    defaults = {
+        "astronomy_show": astronomy_show,
+        "planetarium_dome": planetarium_dome,
+        "show_time": timezone.make_aware(datetime(2025, 6, 8, 19, 0)),
+    }
+    defaults.update(params)
+
+    return ShowSession.objects.create(**defaults)
+
+
+def tickets_payload(show_session, places):
+    return {
+        "tickets": [
+            {"row": row, "seat": seat, "show_session": show_session.id}
+            for row, seat in places
+        ]
+    }
+
+
+class UnauthenticatedReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(RESERVATION_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AdminReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.test",
+            password="adminpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def test_create_reservation(self):
+        payload = tickets_payload(self.show_session, [(1, 1), (1, 2)])
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(
+            set(reservation.tickets.values_list("row", "seat")),
+            {(1, 1), (1, 2)}
+        )
+        self.assertEqual(
+            [ticket["show_session"] for ticket in res.data["tickets"]],
+            [self.show_session.id, self.show_session.id]
+        )
+
+    def test_create_reservation_updates_sold_places(self):
+        payload = tickets_payload(self.show_session, [(1, 1), (1, 2)])
+
+        self.client.post(RESERVATION_URL, payload, format="json")
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(self.show_session.sold_places, 2)
+
+    def test_delete_reservation_updates_sold_places(self):
+        payload = tickets_payload(self.show_session, [(1, 1), (1, 2)])
+        reservation_id = self.client.post(
+            RESERVATION_URL, payload, format="json"
+        ).data["id"]
+
+        res = self.client.delete(detail_url(reservation_id))
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.show_session.sold_places, 0)
+
+    def assert_sold_places(self, *expected):
+        self.assertEqual(
+            list(
+                ShowSession.objects
+                .filter(id__in=[self.show_session.id, self.other_session.id])
+                .order_by("id")
+                .values_list("sold_places", flat=True)
+            ),
+            list(expected),
+        )
+
+    def test_ticket_writes_outside_api_update_sold_places(self):
+        self.other_session = ShowSession.objects.create(
+            planetarium_dome=self.show_session.planetarium_dome,
+            astronomy_show=self.show_session.astronomy_show,
+            show_time=self.show_session.show_time.replace(hour=21),
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        first_ticket, second_ticket, third_ticket = (
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=self.show_session,
+                reservation=reservation,
+            )
+            for seat in range(1, 4)
+        )
+        self.assert_sold_places(3, 0)
+
+        first_ticket.show_session = self.other_session
+        first_ticket.save()
+        self.assert_sold_places(2, 1)
+
+        first_ticket.delete()
+        Ticket.objects.filter(id=second_ticket.id).delete()
+        self.assert_sold_places(1, 0)
+
+        self.user.delete()
+        self.assert_sold_places(0, 0)
+
+    def test_ticket_writes_outside_api_bump_version(self):
+        version = self.show_session.version
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(self.show_session.version, version + 1)
+
+    def test_create_reservation_query_count_does_not_grow(self):
+        small_payload = tickets_payload(self.show_session, [(1, 1)])
+        large_payload = tickets_payload(
+            self.show_session,
+            [(2, seat) for seat in range(1, 21)]
+        )
+
+        with self.assertNumQueries(10):
+            res = self.client.post(
+                RESERVATION_URL, small_payload, format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(10):
+            res = self.client.post(
+                RESERVATION_URL, large_payload, format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 21)
+
+    def test_reservation_list_cursor_pagination(self):
+        for seat in range(1, 4):
+            self.client.post(
+                RESERVATION_URL,
+                tickets_payload(self.show_session, [(1, seat)]),
+                format="json"
+            )
+
+        res = self.client.get(RESERVATION_URL, {"limit": 2})
+        next_res = self.client.get(res.data["next"])
+
+        self.assertNotIn("count", res.data)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertEqual(len(next_res.data["results"]), 1)
+        self.assertIsNone(next_res.data["next"])
+
+    def test_reservation_list_show_session_available_places(self):
+        another_show_session = ShowSession.objects.create(
+            astronomy_show=self.show_session.astronomy_show,
+            planetarium_dome=self.show_session.planetarium_dome,
+            show_time=timezone.make_aware(datetime(2025, 6, 9, 19, 0)),
+        )
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.show_session, [(1, 1), (1, 2)]),
+            format="json"
+        )
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(another_show_session, [(1, 1)]),
+            format="json"
+        )
+
+        res = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(
+            [
+                (
+                    ticket["show_session"]["id"],
+                    ticket["show_session"]["available_places"],
+                )
+                for reservation in res.data["results"]
+                for ticket in reservation["tickets"]
+            ],
+            [
+                (self.show_session.id, 498),
+                (self.show_session.id, 498),
+                (another_show_session.id, 499),
+            ]
+        )
+
+    def test_export_reservations_csv(self):
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.show_session, [(1, 1), (1, 2)]),
+            format="json"
+        )
+
+        res = self.client.get(RESERVATION_EXPORT_URL)
+        rows = list(csv.reader(
+            b"".join(res.streaming_content).decode().splitlines()
+        ))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            rows[0][:4], ["reservation", "reserved_at", "user", "ticket"]
+        )
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            rows[2][2:],
+            [
+                "admin@admin.test",
+                str(Ticket.objects.latest("id").id),
+                str(self.show_session.id),
+                str(self.show_session.show_time),
+                "Test title",
+                "Test name",
+                "1",
+                "2",
+            ]
+        )
+
+    def test_export_reservations_ndjson(self):
+        self.client.post(
+            RESERVATION_URL,
+            tickets_payload(self.show_session, [(3, 4)]),
+            format="json"
+        )
+
+        res = self.client.get(RESERVATION_EXPORT_URL, {"format": "ndjson"})
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(
+            res["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["row"], rows[0]["seat"]), (3, 4))
+        self.assertEqual(rows[0]["user"], "admin@admin.test")
+
+    def test_export_reservations_staff_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.test",
+                password="testpassword",
+            )
+        )
+
+        res = self.client.get(RESERVATION_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_reservation_with_taken_seat(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=3,
+            seat=4,
+            show_session=self.show_session,
+            reservation=reservation,
+        )
+        payload = tickets_payload(self.show_session, [(3, 3), (3, 4)])
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", res.data)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_reservation_with_duplicated_seat(self):
+        payload = tickets_payload(self.show_session, [(5, 5), (5, 5)])
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_reservation_with_seat_out_of_range(self):
+        payload = tickets_payload(self.show_session, [(21, 1)])
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_create_reservation_with_unknown_show_session(self):
+        unknown_show_session = ShowSession(id=self.show_session.id + 1)
+        payload = tickets_payload(unknown_show_session, [(1, 1)])
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri.models import (
+    AstronomyShow,
+    HeldSeat,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
+
+SEAT_HOLD_URL = reverse("centauri:seathold-list")
+RESERVATION_URL = reverse("centauri:reservation-list")
+
+
+def sample_show_session(**params) -> ShowSession:
+    planetarium_dome = PlanetariumDome.objects.create(
+        name="Test name",
+        rows=20,
+        seats_in_row=25,
+    )
+    astronomy_show = AstronomyShow.objects.create(
+        title="Test title",
+        description="Test description",
+    )
+    defaults = {
+        "astronomy_show": astronomy_show,
+        "planetarium_dome": planetarium_dome,
+        "show_time": timezone.make_aware(datetime(2025, 6, 8, 19, 0)),
+    }
+    defaults.update(params)
+
+    return ShowSession.objects.create(**defaults)
+
+
+def sample_seat_hold(show_session, user, places, **params) -> SeatHold:
+    defaults = {
+        "show_session": show_session,
+        "user": user,
+        "expires_at": timezone.now() + timedelta(minutes=10),
+    }
+    defaults.update(params)
+    hold = SeatHold.objects.create(**defaults)
+    HeldSeat.objects.bulk_create(
+        HeldSeat(row=row, seat=seat, show_session=show_session, hold=hold)
+        for row, seat in places
+    )
+    return hold
+
+
+def seat_hold_payload(show_session, places):
+    return {
+        "show_session": show_session.id,
+        "seats": [{"row": row, "seat": seat} for row, seat in places],
+    }
+
+
+class UnauthenticatedSeatHoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AdminSeatHoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@admin.test",
+            password="adminpassword",
+            is_staff=True,
+        )
+        self.another_user = get_user_model().objects.create_user(
+            email="another@admin.test",
+            password="anotherpassword",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def test_create_seat_hold(self):
+        payload = seat_hold_payload(self.show_session, [(1, 1), (1, 2)])
+
+        res = self.client.post(SEAT_HOLD_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get(id=res.data["id"])
+        self.assertEqual(hold.user, self.user)
+        self.assertFalse(hold.is_expired)
+        self.assertEqual(
+            set(hold.seats.values_list("row", "seat")),
+            {(1, 1), (1, 2)}
+        )
+
+    def test_create_seat_hold_with_held_seat(self):
+        sample_seat_hold(self.show_session, self.another_user, [(1, 2)])
+        payload = seat_hold_payload(self.show_session, [(1, 1), (1, 2)])
+
+        res = self.client.post(SEAT_HOLD_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seats", res.data)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_create_seat_hold_with_sold_seat(self):
+        reservation = Reservation.objects.create(user=self.another_user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=reservation,
+        )
+        payload = seat_hold_payload(self.show_session, [(1, 1)])
+
+        res = self.client.post(SEAT_HOLD_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_seat_hold_replaces_expired_hold(self):
+        sample_seat_hold(
+            self.show_session,
+            self.another_user,
+            [(1, 1)],
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        payload = seat_hold_payload(self.show_session, [(1, 1)])
+
+        res = self.client.post(SEAT_HOLD_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_seat_hold_list_shows_own_holds_only(self):
+        sample_seat_hold(self.show_session, self.user, [(1, 1)])
+        sample_seat_hold(self.show_session, self.another_user, [(2, 1)])
+
+        res = self.client.get(SEAT_HOLD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+
+    def test_create_reservation_from_seat_hold(self):
+        hold = sample_seat_hold(self.show_session, self.user, [(3, 1), (3, 2)])
+
+        res = self.client.post(
+            RESERVATION_URL, {"hold": hold.id}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Ticket.objects.values_list("row", "seat")),
+            {(3, 1), (3, 2)}
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(HeldSeat.objects.exists())
+
+    def test_create_reservation_from_expired_seat_hold(self):
+        hold = sample_seat_hold(
+            self.show_session,
+            self.user,
+            [(3, 1)],
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        res = self.client.post(
+            RESERVATION_URL, {"hold": hold.id}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_reservation_with_seat_held_by_another_user(self):
+        sample_seat_hold(self.show_session, self.another_user, [(4, 4)])
+        payload = {
+            "tickets": [
+                {"row": 4, "seat": 4, "show_session": self.show_session.id}
+            ]
+        }
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_sweep_seat_holds(self):
+        sample_seat_hold(
+            self.show_session,
+            self.user,
+            [(1, 1)],
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        active_hold = sample_seat_hold(self.show_session, self.user, [(1, 2)])
+
+        call_command("sweep_seat_holds", stdout=StringIO())
+
+        self.assertEqual(list(SeatHold.objects.all()), [active_hold])
+        self.assertEqual(HeldSeat.objects.count(), 1)
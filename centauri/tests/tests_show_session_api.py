@@ -1,6 +1,11 @@
-from datetime import datetime
+import base64
+import json
+from datetime import datetime, timedelta
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
 from django.db.models import F, Count
 from django.test import TestCase
 from django.utils import timezone
@@ -8,11 +13,15 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from centauri.cache import CATALOG_CACHE
 from centauri.models import (
     ShowSession,
     AstronomyShow,
     ShowTheme,
-    PlanetariumDome
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    Ticket,
 )
 from centauri.serializers import (
     ShowSessionListSerializer,
@@ -20,12 +29,25 @@ from centauri.serializers import (
 )
 
 SHOW_SESSION_URL = reverse("centauri:showsession-list")
+SHOW_SESSION_EXPORT_URL = reverse("centauri:showsession-export")
+SHOW_SESSION_SCHEDULE_URL = reverse("centauri:showsession-schedule")
 
 
 def detail_url(show_session_id):
     return reverse("centauri:showsession-detail", args=(show_session_id,))
 
 
+def seat_map_url(show_session_id):
+    return reverse("centauri:showsession-seat-map", args=(show_session_id,))
+
+
+def allocate_seats_url(show_session_id):
+    return reverse(
+        "centauri:showsession-allocate-seats",
+        args=(show_session_id,)
+    )
+
+
 def sample_astronomy_show() -> AstronomyShow:
     show_theme_1 = ShowTheme.objects.create(name="Test show")
     show_theme_2 = ShowTheme.objects.create(name="Test second show")
@@ -46,7 +68,7 @@ def sample_show_session(**params) -> ShowSession:
     defaults = {
         "astronomy_show": sample_astronomy_show(),
         "planetarium_dome": planetarium_dome,
-        "show_time": datetime(2025, 6, 8, 19, 0),
+        "show_time": timezone.now() + timedelta(days=1),
     }
     defaults.update(params)
 
@@ -87,6 +109,33 @@ class AuthenticatedShowSessionTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
 
+    def test_show_session_list_cursor_pagination(self):
+        show_session = sample_show_session()
+        for hours in (1, 2):
+            ShowSession.objects.create(
+                astronomy_show=show_session.astronomy_show,
+                planetarium_dome=show_session.planetarium_dome,
+                show_time=show_session.show_time + timedelta(hours=hours),
+            )
+
+        res = self.client.get(SHOW_SESSION_URL, {"limit": 2})
+        next_res = self.client.get(res.data["next"])
+
+        self.assertNotIn("count", res.data)
+        self.assertEqual(
+            [
+                show_session["id"]
+                for page in (res.data, next_res.data)
+                for show_session in page["results"]
+            ],
+            list(
+                ShowSession.objects
+                .order_by("show_time", "id")
+                .values_list("id", flat=True)
+            )
+        )
+        self.assertIsNone(next_res.data["next"])
+
     def test_filter_show_sessions_by_show_date(self):
         show_session = sample_show_session()
 
@@ -105,6 +154,55 @@ class AuthenticatedShowSessionTests(TestCase):
 
         self.assertIn(serializer.data[0], res.data["results"])
 
+    def test_show_session_list_hides_past_sessions(self):
+        show_session = sample_show_session()
+        past_show_session = ShowSession.objects.create(
+            astronomy_show=show_session.astronomy_show,
+            planetarium_dome=show_session.planetarium_dome,
+            show_time=timezone.now() - timedelta(days=1),
+        )
+
+        res = self.client.get(SHOW_SESSION_URL)
+        past_res = self.client.get(SHOW_SESSION_URL, {"include_past": "true"})
+
+        self.assertEqual(
+            [show_session["id"] for show_session in res.data["results"]],
+            [show_session.id]
+        )
+        self.assertEqual(
+            [show_session["id"] for show_session in past_res.data["results"]],
+            [past_show_session.id, show_session.id]
+        )
+
+    def test_filter_show_sessions_by_show_date_range(self):
+        show_session = sample_show_session(
+            show_time=timezone.make_aware(datetime(2025, 6, 8, 23, 59))
+        )
+        for show_time in (
+                datetime(2025, 6, 6, 23, 59),
+                datetime(2025, 6, 9, 0, 0),
+        ):
+            ShowSession.objects.create(
+                astronomy_show=show_session.astronomy_show,
+                planetarium_dome=show_session.planetarium_dome,
+                show_time=timezone.make_aware(show_time),
+            )
+
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {"show_date_from": "2025-06-07", "show_date_to": "2025-06-08"}
+        )
+
+        self.assertEqual(
+            [show_session["id"] for show_session in res.data["results"]],
+            [show_session.id]
+        )
+
+    def test_filter_show_sessions_by_invalid_show_date(self):
+        res = self.client.get(SHOW_SESSION_URL, {"show_date": "08.06.2025"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_filter_show_sessions_by_planetarium_dome_name(self):
         show_session = sample_show_session()
 
@@ -143,6 +241,30 @@ class AuthenticatedShowSessionTests(TestCase):
 
         self.assertIn(serializer.data[0], res.data["results"])
 
+    def test_filter_show_sessions_by_astronomy_show_id(self):
+        show_session = sample_show_session()
+        ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(title="Other title"),
+            planetarium_dome=show_session.planetarium_dome,
+            show_time=show_session.show_time + timedelta(hours=1),
+        )
+
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {"astronomy_show_id": show_session.astronomy_show_id}
+        )
+
+        self.assertEqual(
+            [show_session["id"] for show_session in res.data["results"]],
+            [show_session.id]
+        )
+
+    def test_filter_show_sessions_by_invalid_astronomy_show_id(self):
+        res = self.client.get(SHOW_SESSION_URL, {"astronomy_show_id": "1.5"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("astronomy_show_id", res.data)
+
     def test_retrieve_show_session_detail(self):
         show_session = sample_show_session()
 
@@ -155,6 +277,139 @@ class AuthenticatedShowSessionTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_show_session_not_modified(self):
+        show_session = sample_show_session()
+        etag = self.client.get(detail_url(show_session.id))["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(show_session.id), HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_retrieve_show_session_etag_changes_with_tickets(self):
+        show_session = sample_show_session()
+        etag = self.client.get(detail_url(show_session.id))["ETag"]
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=show_session,
+            reservation=reservation,
+        )
+
+        res = self.client.get(
+            detail_url(show_session.id), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["taken_places"], [{"row": 1, "seat": 1}])
+
+    def test_retrieve_show_session_etag_changes_with_related_rows(self):
+        show_session = sample_show_session()
+        astronomy_show = show_session.astronomy_show
+        show_theme = astronomy_show.show_themes.first()
+
+        def rename_show_theme():
+            show_theme.name = "Renamed"
+            show_theme.save()
+
+        for change in (
+            rename_show_theme,
+            lambda: astronomy_show.show_themes.remove(show_theme),
+            lambda: show_theme.astronomy_shows.add(astronomy_show),
+            lambda: show_theme.delete(),
+            lambda: astronomy_show.save(),
+            lambda: show_session.planetarium_dome.save(),
+        ):
+            etag = self.client.get(detail_url(show_session.id))["ETag"]
+            # The ETag is read from the rows, not the catalog cache
+            caches[CATALOG_CACHE].clear()
+            change()
+
+            res = self.client.get(
+                detail_url(show_session.id), HTTP_IF_NONE_MATCH=etag
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res["ETag"], etag)
+
+    def test_show_session_seat_map(self):
+        show_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        for row, seat in [(1, 1), (1, 25), (2, 1), (20, 25)]:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                show_session=show_session,
+                reservation=reservation,
+            )
+
+        res = self.client.get(seat_map_url(show_session.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 20)
+        self.assertEqual(res.data["seats_in_row"], 25)
+        seat_map = base64.b64decode(res.data["seat_map"])
+        self.assertEqual(len(seat_map), (20 * 25 + 7) // 8)
+        taken_indexes = {
+            index
+            for index in range(20 * 25)
+            if seat_map[index // 8] & (0x80 >> (index % 8))
+        }
+        self.assertEqual(taken_indexes, {0, 24, 25, 499})
+
+    def test_show_session_list_available_places(self):
+        show_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=1,
+                seat=seat,
+                show_session=show_session,
+                reservation=reservation,
+            )
+            for seat in range(1, 4)
+        )
+        call_command("recount_sold_places", stdout=StringIO())
+
+        res = self.client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(res.data["results"][0]["available_places"], 497)
+
+    def test_recount_sold_places_bumps_version_of_corrected_sessions(self):
+        show_session = sample_show_session()
+        counted_session = ShowSession.objects.create(
+            astronomy_show=show_session.astronomy_show,
+            planetarium_dome=show_session.planetarium_dome,
+            show_time=show_session.show_time.replace(hour=21),
+        )
+        Ticket.objects.bulk_create([
+            Ticket(
+                row=1,
+                seat=1,
+                show_session=show_session,
+                reservation=Reservation.objects.create(user=self.user),
+            )
+        ])
+        versions = {
+            session.id: session.version
+            for session in (show_session, counted_session)
+        }
+
+        call_command("recount_sold_places", stdout=StringIO())
+
+        show_session.refresh_from_db()
+        counted_session.refresh_from_db()
+        self.assertEqual(show_session.sold_places, 1)
+        self.assertEqual(show_session.version, versions[show_session.id] + 1)
+        self.assertEqual(
+            counted_session.version, versions[counted_session.id]
+        )
+
     def test_create_show_session_forbidden(self):
         planetarium_dome = PlanetariumDome.objects.create(
             name="test dom name",
@@ -205,3 +460,189 @@ class AdminShowSessionTest(TestCase):
             if hasattr(model_value, "id"):
                 model_value = model_value.id
             self.assertEqual(payload[key], model_value)
+
+    def schedule_payload(self, **params):
+        astronomy_show = sample_astronomy_show()
+        self.planetarium_domes = [
+            PlanetariumDome.objects.create(
+                name=name, rows=10, seats_in_row=10
+            )
+            for name in ("North dome", "South dome")
+        ]
+        payload = {
+            "astronomy_show": astronomy_show.id,
+            "planetarium_domes": [dome.id for dome in self.planetarium_domes],
+            # Mondays and Wednesdays of two weeks
+            "weekdays": [0, 2],
+            "times": ["18:00", "20:30"],
+            "date_from": "2025-09-01",
+            "date_to": "2025-09-14",
+        }
+        payload.update(params)
+        return payload
+
+    def test_schedule_show_sessions(self):
+        payload = self.schedule_payload()
+
+        res = self.client.post(SHOW_SESSION_SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["show_sessions"]), 16)
+        self.assertEqual(res.data["conflicts"], [])
+        self.assertEqual(
+            sorted(
+                ShowSession.objects
+                .filter(planetarium_dome=self.planetarium_domes[0])
+                .values_list("show_time", flat=True)
+            ),
+            [
+                timezone.make_aware(datetime(2025, 9, day, hour, minute))
+                for day in (1, 3, 8, 10)
+                for hour, minute in ((18, 0), (20, 30))
+            ]
+        )
+
+    def test_schedule_show_sessions_with_conflicts(self):
+        payload = self.schedule_payload()
+        ShowSession.objects.create(
+            astronomy_show_id=payload["astronomy_show"],
+            planetarium_dome=self.planetarium_domes[1],
+            show_time=timezone.make_aware(datetime(2025, 9, 3, 18, 0)),
+        )
+
+        res = self.client.post(SHOW_SESSION_SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data["show_sessions"], [])
+        self.assertEqual(
+            res.data["conflicts"],
+            [
+                {
+                    "planetarium_dome": self.planetarium_domes[1].id,
+                    "show_time": "2025-09-03T18:00:00Z",
+                }
+            ]
+        )
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+    def test_schedule_show_sessions_skipping_conflicts(self):
+        payload = self.schedule_payload(skip_conflicts=True)
+        ShowSession.objects.create(
+            astronomy_show_id=payload["astronomy_show"],
+            planetarium_dome=self.planetarium_domes[1],
+            show_time=timezone.make_aware(datetime(2025, 9, 3, 18, 0)),
+        )
+
+        res = self.client.post(SHOW_SESSION_SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["show_sessions"]), 15)
+        self.assertEqual(len(res.data["conflicts"]), 1)
+
+    def test_schedule_show_sessions_query_count_does_not_grow(self):
+        payload = self.schedule_payload(date_to="2025-12-31")
+
+        with self.assertNumQueries(6):
+            res = self.client.post(SHOW_SESSION_SCHEDULE_URL, payload)
+
+        self.assertEqual(len(res.data["show_sessions"]), 144)
+
+    def test_schedule_show_sessions_in_unknown_dome(self):
+        payload = self.schedule_payload()
+        payload["planetarium_domes"].append(
+            self.planetarium_domes[-1].id + 1
+        )
+
+        res = self.client.post(SHOW_SESSION_SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("planetarium_domes", res.data)
+
+    def test_allocate_seats_holds_centered_block(self):
+        show_session = sample_show_session()
+
+        res = self.client.post(
+            allocate_seats_url(show_session.id),
+            {"seats": 3},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get(id=res.data["id"])
+        self.assertEqual(
+            sorted(hold.seats.values_list("row", "seat")),
+            [(10, 12), (10, 13), (10, 14)]
+        )
+
+    def test_allocate_seats_skips_taken_places(self):
+        show_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=row,
+                seat=13,
+                show_session=show_session,
+                reservation=reservation,
+            )
+            for row in range(1, 21)
+        )
+
+        res = self.client.post(
+            allocate_seats_url(show_session.id),
+            {"seats": 12, "row_from": 5, "row_to": 6, "reserve": True},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(
+                (ticket["row"], ticket["seat"])
+                for ticket in res.data["tickets"]
+            ),
+            [(5, seat) for seat in range(1, 13)]
+        )
+
+    def test_allocate_seats_without_free_block(self):
+        show_session = sample_show_session()
+
+        res = self.client.post(
+            allocate_seats_url(show_session.id),
+            {"seats": 26},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_export_show_session_tickets_with_filters(self):
+        show_session = sample_show_session()
+        past_show_session = ShowSession.objects.create(
+            astronomy_show=show_session.astronomy_show,
+            planetarium_dome=show_session.planetarium_dome,
+            show_time=timezone.now() - timedelta(days=1),
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        for session in (show_session, past_show_session):
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                show_session=session,
+                reservation=reservation,
+            )
+
+        res = self.client.get(SHOW_SESSION_EXPORT_URL, {"format": "ndjson"})
+        all_res = self.client.get(
+            SHOW_SESSION_EXPORT_URL,
+            {"format": "ndjson", "include_past": "true"},
+        )
+
+        self.assertEqual(
+            [
+                json.loads(line)["show_session"]
+                for line in b"".join(res.streaming_content).splitlines()
+            ],
+            [show_session.id]
+        )
+        self.assertEqual(
+            len(b"".join(all_res.streaming_content).splitlines()), 2
+        )
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from centauri.models import ThrottleBucket
+from centauri.throttling import BookingRateThrottle, BrowsingRateThrottle
+
+
+class TestBrowsingRateThrottle(BrowsingRateThrottle):
+    rate = "2/min"
+
+
+class TestBookingRateThrottle(BookingRateThrottle):
+    rate = "1/min"
+
+
+class ThrottledView(APIView):
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (TestBrowsingRateThrottle, TestBookingRateThrottle)
+
+    def get(self, request):
+        return Response()
+
+    def post(self, request):
+        return Response()
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="testpassword",
+        )
+        self.now = 6000.0
+        timer = mock.patch(
+            "rest_framework.throttling.SimpleRateThrottle.timer",
+            lambda throttle: self.now,
+        )
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def request(self, method="get", user=None):
+        request = getattr(self.factory, method)("/")
+        force_authenticate(request, user or self.user)
+        return ThrottledView.as_view()(request)
+
+    def assert_throttled_after(self, count, method="get"):
+        for _ in range(count):
+            self.assertEqual(
+                self.request(method).status_code, status.HTTP_200_OK
+            )
+        res = self.request(method)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_browsing_and_booking_are_counted_separately(self):
+        self.assert_throttled_after(2)
+        self.assert_throttled_after(1, method="post")
+
+    def test_users_are_counted_separately(self):
+        self.assert_throttled_after(2)
+        another_user = get_user_model().objects.create_user(
+            email="another@test.test",
+            password="testpassword",
+        )
+
+        self.assertEqual(
+            self.request(user=another_user).status_code, status.HTTP_200_OK
+        )
+
+    def test_previous_window_counts_by_its_remaining_share(self):
+        self.request()
+        self.request()
+
+        self.now += 60 + 45
+        res = self.request()
+        next_res = self.request()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            next_res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    @override_settings(
+        THROTTLE_STORE="centauri.throttling.DatabaseThrottleStore"
+    )
+    def test_database_store(self):
+        self.assert_throttled_after(2)
+
+        self.assertEqual(
+            list(ThrottleBucket.objects.values_list("window_start", "count")),
+            [(6000, 3)]
+        )
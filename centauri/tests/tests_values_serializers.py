@@ -0,0 +1,116 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from centauri.cache import CATALOG_CACHE
+from centauri.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ShowTheme,
+)
+from centauri.views import (
+    AstronomyShowViewSet,
+    PlanetariumDomeViewSet,
+    ShowSessionViewSet,
+)
+
+TITLES = (
+    "Journey into black holes",
+    'Stars, "quoted" & <escaped>',
+    "Ünïcödé nebulae ✨",
+    "Line\u2028separated\u2029title",
+)
+
+
+class ValuesListEquivalenceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="testpassword",
+        )
+        self.client.force_authenticate(self.user)
+        show_themes = [
+            ShowTheme.objects.create(name=name)
+            for name in ("Galaxies", "Black holes", "Тёмная материя")
+        ]
+        for index, title in enumerate(TITLES):
+            planetarium_dome = PlanetariumDome.objects.create(
+                name=f"{title} dome",
+                rows=index + 5,
+                seats_in_row=index + 7,
+            )
+            astronomy_show = AstronomyShow.objects.create(
+                title=title,
+                description="Black holes and galaxies",
+            )
+            astronomy_show.show_themes.add(*show_themes[index % 3:])
+            for hours in range(3):
+                ShowSession.objects.create(
+                    astronomy_show=astronomy_show,
+                    planetarium_dome=planetarium_dome,
+                    show_time=(
+                        timezone.now()
+                        + timedelta(days=1, hours=hours, microseconds=index)
+                    ),
+                )
+        ShowSession.update_sold_places(
+            {ShowSession.objects.earliest("show_time").id: 3}
+        )
+
+    def assert_same_content(self, url, query_params=None):
+        caches[CATALOG_CACHE].clear()
+        res = self.client.get(url, query_params)
+        caches[CATALOG_CACHE].clear()
+        with (
+            mock.patch.object(
+                ShowSessionViewSet, "list_values_serializer", None
+            ),
+            mock.patch.object(
+                AstronomyShowViewSet, "list_values_serializer", None
+            ),
+            mock.patch.object(
+                PlanetariumDomeViewSet, "list_values_serializer", None
+            ),
+        ):
+            serializer_res = self.client.get(url, query_params)
+
+        self.assertEqual(res.status_code, serializer_res.status_code)
+        self.assertEqual(res.content, serializer_res.content)
+        return res
+
+    def test_show_session_list(self):
+        url = reverse("centauri:showsession-list")
+
+        res = self.assert_same_content(url, {"limit": 5})
+        self.assert_same_content(res.data["next"])
+        self.assert_same_content(url, {"astronomy_show": "nebulae"})
+
+    def test_astronomy_show_list(self):
+        url = reverse("centauri:astronomyshow-list")
+
+        self.assert_same_content(url)
+        self.assert_same_content(url, {"search": "black holes"})
+        self.assert_same_content(url, {"show_themes": "материя"})
+        self.assert_same_content(url, {"limit": 2, "offset": 1})
+
+    def test_planetarium_dome_list(self):
+        url = reverse("centauri:planetariumdome-list")
+
+        self.assert_same_content(url)
+        self.assert_same_content(url, {"limit": 3})
+
+    def test_browsable_api_uses_serializers(self):
+        res = self.client.get(
+            reverse("centauri:planetariumdome-list"),
+            HTTP_ACCEPT="text/html",
+        )
+
+        self.assertContains(res, "Ünïcödé nebulae ✨ dome")
@@ -0,0 +1,68 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from centauri.management.commands import wait_for_db
+
+
+class WaitForDbTests(TestCase):
+    def call_wait_for_db(self, *args):
+        stdout = StringIO()
+        call_command("wait_for_db", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_retries_with_backoff_until_database_is_available(self):
+        unavailable = connection.Database.OperationalError("unavailable")
+        with (
+            mock.patch.object(
+                connection.Database,
+                "connect",
+                side_effect=[unavailable, unavailable, mock.Mock()],
+            ) as connect,
+            mock.patch.object(wait_for_db.time, "sleep") as sleep,
+        ):
+            output = self.call_wait_for_db()
+
+        self.assertEqual(connect.call_count, 3)
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [0.1, 0.2]
+        )
+        self.assertIn("3 attempts", output)
+
+    def test_gives_up_after_timeout(self):
+        with (
+            mock.patch.object(
+                connection.Database,
+                "connect",
+                side_effect=connection.Database.OperationalError(
+                    "unavailable"
+                ),
+            ),
+            self.assertRaises(CommandError),
+        ):
+            self.call_wait_for_db("--timeout", "0.3")
+
+    def test_migrate_is_skipped_when_migrations_are_applied(self):
+        with mock.patch.object(wait_for_db, "call_command") as migrate:
+            output = self.call_wait_for_db("--migrate")
+
+        migrate.assert_not_called()
+        self.assertIn("skipping migrate", output)
+
+    def test_migrate_runs_when_migrations_are_unapplied(self):
+        with (
+            mock.patch.object(
+                wait_for_db.Command,
+                "get_migration_plan",
+                return_value=[(mock.Mock(), False)],
+            ),
+            mock.patch.object(wait_for_db, "call_command") as migrate,
+        ):
+            output = self.call_wait_for_db("--migrate")
+
+        self.assertEqual(migrate.call_args.args, ("migrate",))
+        self.assertIn("1 to apply", output)
@@ -0,0 +1,138 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+from rest_framework.permissions import SAFE_METHODS
+
+from centauri.models import ThrottleBucket
+
+
+class CacheThrottleStore:
+    """
+    Counter buckets in the "throttle" cache, share them between workers
+    with a cache backend that is shared too
+    """
+
+    cache_alias = "throttle"
+
+    def hit(self, key: str, window_start: int, duration: int):
+        """
+        Count a request in the bucket of window_start, return the counts
+        of it and of the previous bucket
+        """
+        cache = caches[self.cache_alias]
+        bucket_key = f"{key}:{window_start}"
+        # Buckets are read for two windows, as current and as previous
+        cache.add(bucket_key, 0, timeout=2 * duration)
+        try:
+            count = cache.incr(bucket_key)
+        except ValueError:
+            # The bucket was evicted between add() and incr()
+            cache.set(bucket_key, 1, timeout=2 * duration)
+            count = 1
+        return count, cache.get(f"{key}:{window_start - duration}", 0)
+
+
+class DatabaseThrottleStore:
+    """
+    Counter buckets in the ThrottleBucket table, counted with one atomic
+    upsert per request
+    """
+
+    def hit(self, key: str, window_start: int, duration: int):
+        table = connection.ops.quote_name(ThrottleBucket._meta.db_table)
+        expires_at = datetime.fromtimestamp(
+            window_start + 2 * duration, tz=dt_timezone.utc
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH current_bucket AS (
+                    INSERT INTO {table} (key, window_start, count, expires_at)
+                    VALUES (%s, %s, 1, %s)
+                    ON CONFLICT (key, window_start)
+                    DO UPDATE SET count = {table}.count + 1
+                    RETURNING count
+                )
+                SELECT
+                    (SELECT count FROM current_bucket),
+                    COALESCE(
+                        (
+                            SELECT count FROM {table}
+                            WHERE key = %s AND window_start = %s
+                        ),
+                        0
+                    )
+                """,
+                [key, window_start, expires_at, key, window_start - duration],
+            )
+            return cursor.fetchone()
+
+
+def get_throttle_store():
+    return import_string(settings.THROTTLE_STORE)()
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Approximate a sliding window from two fixed counter buckets, the
+    previous bucket counts by the share of it the window still covers
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.window_start = int(self.now // self.duration) * self.duration
+        count, previous_count = get_throttle_store().hit(
+            self.key, self.window_start, self.duration
+        )
+        elapsed = (self.now - self.window_start) / self.duration
+        return previous_count * (1 - elapsed) + count <= self.num_requests
+
+    def wait(self):
+        return self.window_start + self.duration - self.now
+
+
+class AnonRateThrottle(
+    SlidingWindowThrottleMixin, throttling.AnonRateThrottle
+):
+    pass
+
+
+class ScopedUserRateThrottle(
+    SlidingWindowThrottleMixin, throttling.UserRateThrottle
+):
+    """Throttle requests of authenticated users with methods"""
+
+    methods = ()
+
+    def allow_request(self, request, view):
+        if request.method not in self.methods:
+            return True
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return super().get_cache_key(request, view)
+
+
+class BrowsingRateThrottle(ScopedUserRateThrottle):
+    scope = "browsing"
+    methods = SAFE_METHODS
+
+
+class BookingRateThrottle(ScopedUserRateThrottle):
+    """Writes, e.g. reservations and seat holds"""
+
+    scope = "booking"
+    methods = ("POST", "PUT", "PATCH", "DELETE")
@@ -1,12 +1,21 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from centauri.async_views import (
+    AsyncAstronomyShowListView,
+    AsyncShowSessionDetailView,
+    AsyncShowSessionListView,
+    AsyncShowSessionSeatMapView,
+)
 from centauri.views import (
     ShowThemeViewSet,
     PlanetariumDomeViewSet,
     AstronomyShowViewSet,
     ShowSessionViewSet,
     ReservationViewSet,
+    SeatHoldViewSet,
+    CatalogCacheStatsView,
+    AnalyticsViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -15,9 +24,36 @@ router.register("planetarium_domes", PlanetariumDomeViewSet)
 router.register("astronomy_shows", AstronomyShowViewSet)
 router.register("show_sessions", ShowSessionViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("seat_holds", SeatHoldViewSet)
+router.register("analytics", AnalyticsViewSet, basename="analytics")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path(
+        "catalog_cache/stats/",
+        CatalogCacheStatsView.as_view(),
+        name="catalog-cache-stats",
+    ),
+    path(
+        "async/show_sessions/",
+        AsyncShowSessionListView.as_view(),
+        name="async-showsession-list",
+    ),
+    path(
+        "async/show_sessions/<int:pk>/",
+        AsyncShowSessionDetailView.as_view(),
+        name="async-showsession-detail",
+    ),
+    path(
+        "async/show_sessions/<int:pk>/seat_map/",
+        AsyncShowSessionSeatMapView.as_view(),
+        name="async-showsession-seat-map",
+    ),
+    path(
+        "async/astronomy_shows/",
+        AsyncAstronomyShowListView.as_view(),
+        name="async-astronomyshow-list",
+    ),
 ]
 
 
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from operator import itemgetter
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ValuesField:
+    """Output value computed from lookups of a values() row"""
+
+    def __init__(self, *lookups, to_representation=None):
+        self.lookups = lookups
+        self.to_representation = to_representation
+
+    def get_getter(self):
+        if self.to_representation is None:
+            return itemgetter(*self.lookups)
+
+        to_representation = self.to_representation
+        if len(self.lookups) == 1:
+            lookup = self.lookups[0]
+            return lambda row: to_representation(row[lookup])
+
+        get_values = itemgetter(*self.lookups)
+        return lambda row: to_representation(*get_values(row))
+
+
+class ValuesManyField:
+    """
+    List of a field of many-to-many related objects, queried once for
+    all rows the way prefetch_related() queries them
+    """
+
+    lookups = ()
+
+    def __init__(self, relation: str, lookup: str):
+        self.relation = relation
+        self.lookup = lookup
+
+    def get_related_rows(self, model, ids):
+        field = model._meta.get_field(self.relation)
+        query_name = field.related_query_name()
+        return field.related_model.objects.filter(
+            **{f"{query_name}__in": ids}
+        ).values_list(query_name, self.lookup)
+
+    def get_related_values(self, model, ids) -> dict[int, list]:
+        related_values = defaultdict(list)
+        for row_id, value in self.get_related_rows(model, ids):
+            related_values[row_id].append(value)
+        return related_values
+
+    async def aget_related_values(self, model, ids) -> dict[int, list]:
+        related_values = defaultdict(list)
+        async for row_id, value in self.get_related_rows(model, ids):
+            related_values[row_id].append(value)
+        return related_values
+
+
+class ValuesSerializer:
+    """
+    Precompiled mapping of values() rows to the output of a read-only
+    list serializer, fields are given in the order of its Meta.fields
+    """
+
+    def __init__(self, model, **fields):
+        self.model = model
+        self.fields = fields
+        self.lookups = list(dict.fromkeys(
+            lookup
+            for field in fields.values()
+            for lookup in field.lookups + ("id",)
+        ))
+        self.getters = {
+            name: field.get_getter()
+            for name, field in fields.items()
+            if isinstance(field, ValuesField)
+        }
+
+    def get_rows(self, queryset):
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    @property
+    def many_fields(self) -> dict[str, ValuesManyField]:
+        return {
+            name: field
+            for name, field in self.fields.items()
+            if isinstance(field, ValuesManyField)
+        }
+
+    def to_representation(self, rows) -> list[dict]:
+        rows = list(rows)
+        ids = [row["id"] for row in rows]
+        many_values = {
+            name: field.get_related_values(self.model, ids)
+            for name, field in self.many_fields.items()
+        }
+        return self.map_rows(rows, many_values)
+
+    async def ato_representation(self, rows) -> list[dict]:
+        ids = [row["id"] for row in rows]
+        many_values = {
+            name: await field.aget_related_values(self.model, ids)
+            for name, field in self.many_fields.items()
+        }
+        return self.map_rows(rows, many_values)
+
+    def map_rows(self, rows, many_values) -> list[dict]:
+        getters = self.getters
+        data = []
+        for row in rows:
+            item = {}
+            for name in self.fields:
+                if name in getters:
+                    item[name] = getters[name](row)
+                else:
+                    item[name] = many_values[name].get(row["id"], [])
+            data.append(item)
+        return data
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Same output as JSONRenderer, encoded with orjson when installed"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        # JSONRenderer escapes these line separators for JavaScript
+        return orjson.dumps(
+            data, default=self.encoder_class().default
+        ).replace(
+            b"\xe2\x80\xa8", b"\\u2028"
+        ).replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class ValuesListMixin:
+    """
+    Render JSON list responses from values() rows mapped by
+    list_values_serializer, without list serializer instances
+    """
+
+    list_values_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.list_values_serializer is None or not isinstance(
+            request.accepted_renderer, JSONRenderer
+        ):
+            return super().list(request, *args, **kwargs)
+
+        request.accepted_renderer = FastJSONRenderer()
+        values_serializer = self.list_values_serializer
+        rows = values_serializer.get_rows(
+            self.filter_queryset(self.get_queryset())
+        )
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                values_serializer.to_representation(page)
+            )
+
+        return Response(values_serializer.to_representation(rows))
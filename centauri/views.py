@@ -1,21 +1,57 @@
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta
 
-from django.db.models import Count, F
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db.models import F, Prefetch, Q, Sum
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiParameter,
+    PolymorphicProxySerializer,
+)
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from centauri.cache import CatalogCacheMixin, get_catalog_cache_stats
+from centauri.exports import EXPORT_RENDERERS, export_tickets
 from centauri.models import (
+    ASTRONOMY_SHOW_SEARCH_VECTOR,
+    SHOW_SESSION_AVAILABLE_PLACES,
+    SHOW_SESSION_ETAG_FIELDS,
+    SHOW_SESSION_ETAG_VALUES,
     ShowTheme,
     PlanetariumDome,
     AstronomyShow,
     ShowSession,
     Reservation,
+    SeatHold,
+    Ticket,
+    DailyDomeOccupancy,
+    DailyShowSales,
+    DailyThemePopularity,
 )
+from centauri.pagination import ShowSessionPagination, ReservationPagination
+from centauri.values_serializers import ValuesListMixin
 from centauri.serializers import (
+    AnalyticsRangeSerializer,
+    DailyDomeOccupancySerializer,
+    ShowSalesSerializer,
+    ThemePopularitySerializer,
+    ASTRONOMY_SHOW_LIST_VALUES,
+    PLANETARIUM_DOME_LIST_VALUES,
+    SHOW_SESSION_LIST_VALUES,
     ShowThemeSerializer,
     PlanetariumDomeSerializer,
     AstronomyShowSerializer,
@@ -25,19 +61,39 @@ from centauri.serializers import (
     AstronomyShowRetrieveSerializer,
     PlanetariumDomeListSerializer,
     ShowSessionRetrieveSerializer,
+    ShowSessionSeatMapSerializer,
     ReservationSerializer,
     ReservationListSerializer,
     AstronomyShowPosterSerializer,
+    SeatHoldSerializer,
+    SeatAllocationSerializer,
+    ShowSessionScheduleSerializer,
 )
 
 
-class ShowThemeViewSet(viewsets.ModelViewSet):
+def _int_query_param(request, name: str) -> int | None:
+    """Integer value of a query parameter, None if it is missing"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+
+
+class ShowThemeViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = ShowTheme.objects.all()
     serializer_class = ShowThemeSerializer
+    cache_dependencies = (ShowTheme,)
 
 
-class PlanetariumDomeViewSet(viewsets.ModelViewSet):
+class PlanetariumDomeViewSet(
+    CatalogCacheMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     queryset = PlanetariumDome.objects.all()
+    cache_dependencies = (PlanetariumDome,)
+    list_values_serializer = PLANETARIUM_DOME_LIST_VALUES
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -46,8 +102,17 @@ class PlanetariumDomeViewSet(viewsets.ModelViewSet):
         return PlanetariumDomeSerializer
 
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
-    queryset = AstronomyShow.objects.prefetch_related("show_themes")
+class AstronomyShowViewSet(
+    CatalogCacheMixin, ValuesListMixin, viewsets.ModelViewSet
+):
+    # Theme changes update show rows, pages need a stable order
+    queryset = (
+        AstronomyShow.objects
+        .prefetch_related("show_themes")
+        .order_by("id")
+    )
+    cache_dependencies = (AstronomyShow, ShowTheme)
+    list_values_serializer = ASTRONOMY_SHOW_LIST_VALUES
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -62,13 +127,55 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = self.queryset
         show_themes = self.request.query_params.get("show_themes")
+        theme_id = _int_query_param(self.request, "theme_id")
+        search = self.request.query_params.get("search")
+        show_themes_through = AstronomyShow.show_themes.through.objects
 
         if show_themes:
             queryset = queryset.filter(
-                show_themes__name__icontains=show_themes
+                id__in=show_themes_through.filter(
+                    showtheme__name__icontains=show_themes
+                ).values("astronomyshow_id")
+            )
+
+        if theme_id is not None:
+            queryset = queryset.filter(
+                id__in=show_themes_through.filter(
+                    showtheme_id=theme_id
+                ).values("astronomyshow_id")
             )
 
-        return queryset.distinct()
+        if search:
+            search_query = SearchQuery(
+                search,
+                search_type="websearch",
+                config="english",
+            )
+            # Every branch of the union is served by its own index
+            matching_themes = ShowTheme.objects.alias(
+                upper_name=Upper("name")
+            ).filter(
+                Q(upper_name__contains=search.upper())
+                | Q(upper_name__trigram_similar=search)
+            )
+            matching_ids = AstronomyShow.objects.alias(
+                search_vector=ASTRONOMY_SHOW_SEARCH_VECTOR
+            ).filter(search_vector=search_query).values("id").union(
+                AstronomyShow.objects.alias(
+                    upper_title=Upper("title")
+                ).filter(upper_title__trigram_similar=search).values("id"),
+                show_themes_through.filter(
+                    showtheme__in=matching_themes
+                ).values("astronomyshow_id"),
+            )
+            queryset = queryset.filter(id__in=matching_ids).annotate(
+                rank=(
+                    SearchRank(ASTRONOMY_SHOW_SEARCH_VECTOR, search_query)
+                    + TrigramSimilarity("title", search)
+                ),
+            ).order_by("-rank", "id")
+
+        return queryset
 
     @action(
         methods=["POST"],
@@ -77,6 +184,8 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAdminUser],
     )
     def upload_poster(self, request, pk=None):
+        # Posters are written to disk in chunks, never held in memory
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
         astronomy_show = self.get_object()
         serializer = self.get_serializer(astronomy_show, data=request.data)
         if serializer.is_valid():
@@ -92,62 +201,267 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.STR,
                 description="Filter by movie show theme name "
                             "(ex. ?show_themes=galaxies)",
-            )
+            ),
+            OpenApiParameter(
+                name="theme_id",
+                type=OpenApiTypes.INT,
+                description="Filter by show theme id (ex. ?theme_id=2)",
+            ),
+            OpenApiParameter(
+                name="search",
+                type=OpenApiTypes.STR,
+                description="Search in title, description and theme names, "
+                            "best matches first (ex. ?search=black holes)",
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
+class ShowSessionViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = ShowSession.objects.all()
+    pagination_class = ShowSessionPagination
+    list_values_serializer = SHOW_SESSION_LIST_VALUES
 
     def get_serializer_class(self):
         if self.action == "list":
             return ShowSessionListSerializer
         elif self.action == "retrieve":
             return ShowSessionRetrieveSerializer
+        elif self.action == "seat_map":
+            return ShowSessionSeatMapSerializer
+        elif self.action == "allocate_seats":
+            return SeatAllocationSerializer
+        elif self.action == "schedule":
+            return ShowSessionScheduleSerializer
 
         return ShowSessionSerializer
 
+    @staticmethod
+    def _day_bounds(show_date: str) -> tuple[datetime, datetime]:
+        """Aware start of a 'YYYY-mm-dd' day and of the next day"""
+        try:
+            day = datetime.strptime(show_date, "%Y-%m-%d")
+        except ValueError:
+            raise ValidationError(
+                {"show_date": "Date must be in 'YYYY-mm-dd' format."}
+            )
+        return (
+            timezone.make_aware(day),
+            timezone.make_aware(day + timedelta(days=1)),
+        )
+
     def get_queryset(self):
         show_date = self.request.query_params.get("show_date")
+        show_date_from = self.request.query_params.get("show_date_from")
+        show_date_to = self.request.query_params.get("show_date_to")
+        include_past = self.request.query_params.get("include_past")
         astronomy_show = self.request.query_params.get("astronomy_show")
+        astronomy_show_id = _int_query_param(
+            self.request, "astronomy_show_id"
+        )
         planetarium_dome = self.request.query_params.get("planetarium_dome")
 
         queryset = self.queryset
 
         if show_date:
-            show_date = datetime.strptime(show_date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=show_date)
+            day_start, next_day_start = self._day_bounds(show_date)
+            queryset = queryset.filter(
+                show_time__gte=day_start,
+                show_time__lt=next_day_start,
+            )
+
+        if show_date_from:
+            day_start, _ = self._day_bounds(show_date_from)
+            queryset = queryset.filter(show_time__gte=day_start)
+
+        if show_date_to:
+            _, next_day_start = self._day_bounds(show_date_to)
+            queryset = queryset.filter(show_time__lt=next_day_start)
 
         if astronomy_show:
             queryset = queryset.filter(
                 astronomy_show__title__icontains=astronomy_show
             )
 
+        if astronomy_show_id is not None:
+            queryset = queryset.filter(astronomy_show_id=astronomy_show_id)
+
         if planetarium_dome:
             queryset = queryset.filter(
                 planetarium_dome__name__icontains=planetarium_dome
             )
 
+        if self.action in ("list", "export") and not (
+                show_date
+                or show_date_from
+                or show_date_to
+                or include_past == "true"
+        ):
+            queryset = queryset.filter(show_time__gte=timezone.now())
+
         if self.action == "retrieve":
-            return queryset.select_related()
+            return (
+                queryset
+                .select_related()
+                .annotate(**SHOW_SESSION_ETAG_VALUES)
+            )
+        elif self.action in ("seat_map", "allocate_seats"):
+            return queryset.select_related("planetarium_dome")
         elif self.action == "list":
             queryset = (
                 queryset
                 .select_related()
-                .annotate(
-                    available_places=(
-                            F("planetarium_dome__rows")
-                            * F("planetarium_dome__seats_in_row")
-                            - Count("tickets")
-                    )
-                )
+                .annotate(available_places=SHOW_SESSION_AVAILABLE_PLACES)
             )
 
         return queryset
 
+    @staticmethod
+    def get_etag(values: dict) -> str:
+        """
+        ETag of the show session values and SHOW_SESSION_ETAG_VALUES,
+        read from the database in the same query
+        """
+        updated_at = "|".join(
+            str(values[field])
+            for field in ("updated_at", *SHOW_SESSION_ETAG_VALUES)
+        )
+        return quote_etag(
+            f"{values['id']}-{values['version']}-"
+            + hashlib.sha256(updated_at.encode()).hexdigest()[:16]
+        )
+
+    @classmethod
+    def get_object_etag(cls, show_session: ShowSession) -> str:
+        return cls.get_etag({
+            field: getattr(show_session, field)
+            for field in SHOW_SESSION_ETAG_FIELDS
+        })
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Show session with taken places, answer a matching If-None-Match
+        with 304 Not Modified looking up only the ETag values
+        """
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            try:
+                values = (
+                    ShowSession.objects
+                    .filter(pk=kwargs["pk"])
+                    .annotate(**SHOW_SESSION_ETAG_VALUES)
+                    .values(*SHOW_SESSION_ETAG_FIELDS)
+                    .first()
+                )
+            except (TypeError, ValueError):
+                values = None
+            if values is not None:
+                etag = self.get_etag(values)
+                if etag in parse_etags(if_none_match) or if_none_match == "*":
+                    return Response(
+                        status=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag},
+                    )
+
+        show_session = self.get_object()
+        serializer = self.get_serializer(show_session)
+        return Response(
+            serializer.data,
+            headers={"ETag": self.get_object_etag(show_session)},
+        )
+
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="seat_map",
+    )
+    def seat_map(self, request, pk=None):
+        """
+        Taken places as a base64 encoded row-major bitmap,
+        one bit per seat, most significant bit first
+        """
+        show_session = self.get_object()
+        serializer = self.get_serializer(show_session)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses={(200, "text/csv"): OpenApiTypes.STR})
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request):
+        """
+        Stream tickets of show sessions matching the list filters
+        as CSV or NDJSON (?format=ndjson)
+        """
+        return export_tickets(
+            request,
+            Ticket.objects.filter(show_session__in=self.get_queryset()),
+            "show_session_tickets",
+        )
+
+    @extend_schema(
+        responses={
+            status.HTTP_201_CREATED: ShowSessionScheduleSerializer,
+            status.HTTP_400_BAD_REQUEST: OpenApiTypes.OBJECT,
+            status.HTTP_409_CONFLICT: ShowSessionScheduleSerializer,
+        },
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+    )
+    def schedule(self, request):
+        """
+        Schedule show sessions of a show in planetarium domes on days
+        of week at times within a date range, in one transaction.
+        Taken slots are reported and cancel the schedule with 409
+        unless skip_conflicts is set
+        """
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            if serializer.data["show_sessions"] or not (
+                    serializer.data["conflicts"]
+            ):
+                return Response(
+                    serializer.data, status=status.HTTP_201_CREATED
+                )
+            return Response(serializer.data, status=status.HTTP_409_CONFLICT)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(
+        responses={
+            status.HTTP_201_CREATED: PolymorphicProxySerializer(
+                component_name="SeatAllocationResult",
+                serializers=[SeatHoldSerializer, ReservationSerializer],
+                resource_type_field_name=None,
+            ),
+        },
+    )
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="allocate_seats",
+    )
+    def allocate_seats(self, request, pk=None):
+        """
+        Hold or reserve the best block of adjacent free seats,
+        optionally within a row range
+        """
+        show_session = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(show_session=show_session, user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -156,12 +470,37 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
                 description="Filter by show session date 'YYYY-mm-dd'"
                             "(ex. ?show_date=2025-06-21)",
             ),
+            OpenApiParameter(
+                name="show_date_from",
+                type=OpenApiTypes.DATE,
+                description="Show sessions on or after the date "
+                            "(ex. ?show_date_from=2025-06-21)",
+            ),
+            OpenApiParameter(
+                name="show_date_to",
+                type=OpenApiTypes.DATE,
+                description="Show sessions on or before the date "
+                            "(ex. ?show_date_to=2025-06-28)",
+            ),
+            OpenApiParameter(
+                name="include_past",
+                type=OpenApiTypes.BOOL,
+                description="Without date filters only upcoming sessions "
+                            "are listed, include past ones "
+                            "(ex. ?include_past=true)",
+            ),
             OpenApiParameter(
                 name="astronomy_show",
                 type=OpenApiTypes.STR,
                 description="Filter by astronomy show title "
                             "(ex. ?astronomy_show=Black hole)",
             ),
+            OpenApiParameter(
+                name="astronomy_show_id",
+                type=OpenApiTypes.INT,
+                description="Filter by astronomy show id "
+                            "(ex. ?astronomy_show_id=3)",
+            ),
             OpenApiParameter(
                 name="planetarium_dome",
                 type=OpenApiTypes.STR,
@@ -176,22 +515,48 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
 
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
+    pagination_class = ReservationPagination
     serializer_class = ReservationSerializer
 
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
 
         if self.action == "list":
-            queryset = queryset.prefetch_related(
-                "tickets__show_session__planetarium_dome",
-                "tickets__show_session__astronomy_show",
-
+            # Sessions are fetched once per page, however many tickets
+            # share them, with just the fields the list renders
+            show_sessions = (
+                ShowSession.objects
+                .select_related("astronomy_show", "planetarium_dome")
+                .only(
+                    "show_time",
+                    "astronomy_show__title",
+                    "planetarium_dome__name",
+                )
+                .annotate(available_places=SHOW_SESSION_AVAILABLE_PLACES)
             )
+            tickets = Ticket.objects.only(
+                "row", "seat", "show_session", "reservation"
+            ).prefetch_related(Prefetch("show_session", show_sessions))
+            queryset = queryset.prefetch_related(Prefetch("tickets", tickets))
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @extend_schema(responses={(200, "text/csv"): OpenApiTypes.STR})
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request):
+        """
+        Stream tickets of all reservations as CSV or NDJSON
+        (?format=ndjson)
+        """
+        return export_tickets(request, Ticket.objects.all(), "reservations")
+
     def get_serializer_class(self):
         serializer = self.serializer_class
 
@@ -199,3 +564,91 @@ class ReservationViewSet(viewsets.ModelViewSet):
             serializer = ReservationListSerializer
 
         return serializer
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.prefetch_related("seats")
+    serializer_class = SeatHoldSerializer
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class CatalogCacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Hit and miss counters of the catalog response cache"""
+        return Response(get_catalog_cache_stats())
+
+
+@extend_schema(parameters=[AnalyticsRangeSerializer])
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Occupancy and sales read from the daily rollups,
+    refreshed by the refresh_rollups command
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get_days(self, request) -> dict:
+        serializer = AnalyticsRangeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return {
+            "day__gte": serializer.validated_data["date_from"],
+            "day__lte": serializer.validated_data["date_to"],
+        }
+
+    @extend_schema(responses=DailyDomeOccupancySerializer(many=True))
+    @action(methods=["GET"], detail=False)
+    def occupancy(self, request):
+        """Sold places of planetarium domes per day"""
+        daily_occupancy = (
+            DailyDomeOccupancy.objects
+            .filter(**self.get_days(request))
+            .select_related("planetarium_dome")
+            .order_by("day", "planetarium_dome__name")
+        )
+        serializer = DailyDomeOccupancySerializer(daily_occupancy, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses=ShowSalesSerializer(many=True))
+    @action(methods=["GET"], detail=False, url_path="show_sales")
+    def show_sales(self, request):
+        """Tickets sold per astronomy show over the range, best first"""
+        show_sales = (
+            DailyShowSales.objects
+            .filter(**self.get_days(request))
+            .values("astronomy_show", title=F("astronomy_show__title"))
+            .annotate(
+                show_sessions=Sum("show_sessions"),
+                tickets=Sum("tickets"),
+            )
+            .order_by("-tickets", "astronomy_show")
+        )
+        serializer = ShowSalesSerializer(show_sales, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses=ThemePopularitySerializer(many=True))
+    @action(methods=["GET"], detail=False, url_path="theme_popularity")
+    def theme_popularity(self, request):
+        """Tickets sold per show theme over the range, most popular first"""
+        theme_popularity = (
+            DailyThemePopularity.objects
+            .filter(**self.get_days(request))
+            .values("show_theme", name=F("show_theme__name"))
+            .annotate(tickets=Sum("tickets"))
+            .order_by("-tickets", "show_theme")
+        )
+        serializer = ThemePopularitySerializer(theme_popularity, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
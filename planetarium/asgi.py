@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "planetarium.settings")
 
 application = get_asgi_application()
+
+# Serve static files the way runserver does while debugging
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
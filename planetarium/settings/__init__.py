@@ -0,0 +1,22 @@
+"""
+Settings of planetarium project, DJANGO_ENV selects the profile:
+dev (the default) or prod
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+DJANGO_ENV = os.environ.get("DJANGO_ENV", "dev")
+
+if DJANGO_ENV == "dev":
+    from planetarium.settings.dev import *  # noqa: F401, F403
+elif DJANGO_ENV == "prod":
+    from planetarium.settings.prod import *  # noqa: F401, F403
+else:
+    raise ImproperlyConfigured(
+        f"DJANGO_ENV must be dev or prod, not {DJANGO_ENV!r}."
+    )
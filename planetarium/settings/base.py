@@ -1,5 +1,5 @@
 """
-Django settings for planetarium project.
+Django settings for planetarium project shared by the dev and prod profiles.
 
 Generated by 'django-admin startproject' using Django 5.2.1.
 
@@ -12,14 +12,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from datetime import timedelta
 from pathlib import Path
-from dotenv import load_dotenv
-
-
-load_dotenv()
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
 # Quick-start development settings - unsuitable for production
@@ -32,7 +28,7 @@ SECRET_KEY = os.environ.get(
 )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = False
 
 ALLOWED_HOSTS = []
 
@@ -46,9 +42,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
-    "debug_toolbar",
     "centauri",
     "user",
 ]
@@ -57,7 +53,6 @@ AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -96,9 +91,67 @@ DATABASES = {
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
         "HOST": os.environ["POSTGRES_HOST"],
         "PORT": os.environ["POSTGRES_PORT"],
+        # Check connections before reuse, in the pool when pooling is on
+        "CONN_HEALTH_CHECKS": (
+            os.environ.get("DB_HEALTH_CHECKS", "true").lower() == "true"
+        ),
+        "OPTIONS": {},
     }
 }
 
+# Every worker process keeps a psycopg pool of connections shared by its
+# threads. Without the pool each thread keeps its own connection for
+# DB_CONN_MAX_AGE seconds, only WSGI threads outlive requests
+if os.environ.get("DB_POOL", "true").lower() == "true":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        # Seconds a request waits for a connection before an error
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        # Seconds until idle connections above min_size are closed
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 5 * 60)),
+        # Seconds until connections are replaced
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", 60 * 60)),
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DB_CONN_MAX_AGE", 0)
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": os.environ.get(
+            "CATALOG_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CATALOG_CACHE_LOCATION", "catalog"),
+        "TIMEOUT": int(os.environ.get("CATALOG_CACHE_TIMEOUT", 60 * 60)),
+    },
+    "users": {
+        "BACKEND": os.environ.get(
+            "USERS_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("USERS_CACHE_LOCATION", "users"),
+        "TIMEOUT": int(os.environ.get("USERS_CACHE_TIMEOUT", 60)),
+    },
+    "throttle": {
+        "BACKEND": os.environ.get(
+            "THROTTLE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("THROTTLE_CACHE_LOCATION", "throttle"),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,30 +198,34 @@ MEDIA_URL = "/media/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-INTERNAL_IPS = [
-    "127.0.0.1",
-]
-
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "centauri.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_PERMISSION_CLASSES": [
         "centauri.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.UserClaimsJWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "centauri.throttling.AnonRateThrottle",
+        "centauri.throttling.BrowsingRateThrottle",
+        "centauri.throttling.BookingRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "50/day",
-        "user": "100/day"
+        "anon": os.environ.get("THROTTLE_RATE_ANON", "50/day"),
+        "browsing": os.environ.get("THROTTLE_RATE_BROWSING", "100/day"),
+        "booking": os.environ.get("THROTTLE_RATE_BOOKING", "100/day"),
     }
 }
 
+# Where throttle counter buckets are kept, the cache store uses the
+# "throttle" cache, DatabaseThrottleStore the ThrottleBucket table
+THROTTLE_STORE = os.environ.get(
+    "THROTTLE_STORE", "centauri.throttling.CacheThrottleStore"
+)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Planetarium API",
     "DESCRIPTION": "Order tickets to astronomy shows",
@@ -182,8 +239,20 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# The schema served at api/v1/schema/ is generated once per code version
+# and kept in this file, see the generate_openapi_schema command
+OPENAPI_SCHEMA_FILE = os.environ.get(
+    "OPENAPI_SCHEMA_FILE", str(BASE_DIR / "openapi-schema.json")
+)
+
+SEAT_HOLD_TTL = timedelta(
+    minutes=int(os.environ.get("SEAT_HOLD_TTL_MINUTES", 10))
+)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER":
+        "user.serializers.UserClaimsTokenObtainPairSerializer",
 }
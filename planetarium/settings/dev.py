@@ -0,0 +1,20 @@
+"""
+Development profile: debug mode, the debug toolbar, and media and static
+files served by Django
+"""
+from planetarium.settings.base import *  # noqa: F401, F403
+from planetarium.settings.base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ["debug_toolbar"]
+
+# The toolbar middleware goes as early as possible, after the ones that
+# encode the response content
+MIDDLEWARE = MIDDLEWARE[:1] + [
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+] + MIDDLEWARE[1:]
+
+INTERNAL_IPS = [
+    "127.0.0.1",
+]
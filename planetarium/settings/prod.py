@@ -0,0 +1,45 @@
+"""
+Production profile: no debug apps or middleware, cached templates and
+JSON only API responses. Media and static files are served by the web
+server in front of the application
+"""
+import os
+
+from planetarium.settings.base import *  # noqa: F401, F403
+from planetarium.settings.base import REST_FRAMEWORK, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
+
+# Collected by collectstatic for the web server, like MEDIA_ROOT
+STATIC_ROOT = "/files/static"
+
+# Templates are compiled once per process
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    ["django.template.loaders.app_directories.Loader"],
+                ),
+            ],
+        },
+    },
+]
+
+# The browsable API renders forms for every response
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
@@ -18,18 +18,20 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from debug_toolbar.toolbar import debug_toolbar_urls
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView
 )
 
-urlpatterns = ([
+from centauri.schema import CachedSpectacularAPIView
+
+urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/centauri/", include("centauri.urls", namespace="centauri")),
     path("api/v1/user/", include("user.urls", namespace="user")),
-    path("api/v1/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path(
+        "api/v1/schema/", CachedSpectacularAPIView.as_view(), name="schema"
+    ),
     path(
         "api/v1/doc/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -40,5 +42,15 @@ urlpatterns = ([
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc"
     )
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-               + debug_toolbar_urls())
+]
+
+# The web server serves media files outside of the dev profile
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+    )
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
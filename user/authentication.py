@@ -0,0 +1,155 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+USERS_CACHE = "users"
+USER_CLAIMS = ("email", "is_staff", "is_active")
+
+
+def _user_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def _changed_at_key(user_id) -> str:
+    return f"user:changed_at:{user_id}"
+
+
+def add_user_claims(token, user) -> None:
+    """Embed the fields request users are built from into token"""
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+
+
+def get_users_cache():
+    """
+    The users cache if workers share it, caches of one process miss
+    users changed by other processes and are not used
+    """
+    users_cache = caches[USERS_CACHE]
+    if isinstance(users_cache, LocMemCache):
+        return None
+    return users_cache
+
+
+def _changed_at_timeout() -> float:
+    # Claims are copied from refresh to access tokens
+    return api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+
+
+def invalidate_user(user_id) -> None:
+    """Stop trusting claims of tokens issued before this change of user"""
+    changed_at = timezone.now()
+    get_user_model().objects.filter(pk=user_id).update(
+        claims_changed_at=changed_at
+    )
+    users_cache = get_users_cache()
+    if users_cache is not None:
+        users_cache.delete(_user_key(user_id))
+        users_cache.set(
+            _changed_at_key(user_id),
+            int(changed_at.timestamp()),
+            timeout=_changed_at_timeout(),
+        )
+
+
+class UserClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Build request users from signed token claims without a query,
+    users changed after the token was issued are loaded and cached.
+    Without a shared users cache every request user is loaded
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        users_cache = get_users_cache()
+        if users_cache is None:
+            return super().get_user(validated_token)
+
+        changed_at = self.get_changed_at(users_cache, user_id)
+        if (
+            changed_at is not None
+            and all(claim in validated_token for claim in USER_CLAIMS)
+            and validated_token.get("iat", 0) > changed_at
+        ):
+            return self.get_claims_user(validated_token, user_id)
+
+        user = users_cache.get(_user_key(user_id))
+        if user is None:
+            user = super().get_user(validated_token)
+            users_cache.set(_user_key(user_id), user)
+        return user
+
+    def get_changed_at(self, users_cache, user_id) -> int | None:
+        """
+        Timestamp of the last change of claims, read from the database
+        when it is not cached, None if there is no such user
+        """
+        changed_at = users_cache.get(_changed_at_key(user_id))
+        if changed_at is not None:
+            return changed_at
+
+        try:
+            claims_changed_at = (
+                self.user_model.objects
+                .filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list("claims_changed_at", flat=True)
+                .get()
+            )
+        except (self.user_model.DoesNotExist, ValueError):
+            return None
+        changed_at = (
+            int(claims_changed_at.timestamp()) if claims_changed_at else 0
+        )
+        # A newer value of invalidate_user() is kept
+        users_cache.add(
+            _changed_at_key(user_id),
+            changed_at,
+            timeout=_changed_at_timeout(),
+        )
+        return changed_at
+
+    def get_claims_user(self, validated_token, user_id):
+        """
+        User instance with fields from claims, other fields are deferred
+        and loaded on access like after only()
+        """
+        values = {api_settings.USER_ID_FIELD: user_id}
+        values.update(
+            (claim, validated_token[claim]) for claim in USER_CLAIMS
+        )
+        field_names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in values
+        ]
+        user = self.user_model.from_db(
+            DEFAULT_DB_ALIAS,
+            field_names,
+            [values[field_name] for field_name in field_names],
+        )
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return user
+
+
+class UserClaimsJWTScheme(SimpleJWTScheme):
+    target_class = UserClaimsJWTAuthentication
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0002_alter_user_managers_remove_user_username_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="claims_changed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
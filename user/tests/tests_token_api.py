@@ -0,0 +1,144 @@
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from user.authentication import USERS_CACHE
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+USER_MANAGE_URL = reverse("user:manage_user")
+SHOW_THEME_URL = reverse("centauri:showtheme-list")
+
+
+class UserClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        # Claims are only trusted with a users cache shared by workers
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(CACHES={
+            **settings.CACHES,
+            USERS_CACHE: {
+                "BACKEND": (
+                    "django.core.cache.backends.filebased.FileBasedCache"
+                ),
+                "LOCATION": directory.name,
+            },
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="testpassword",
+        )
+
+    def authenticate(self, email="test@test.test", password="testpassword"):
+        res = self.client.post(
+            TOKEN_URL, {"email": email, "password": password}
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        table = get_user_model()._meta.db_table
+        return [
+            query for query in queries if f'"{table}"' in query["sql"]
+        ]
+
+    def test_request_user_is_built_from_claims(self):
+        self.authenticate()
+
+        # Only the time claims last changed is read, then it is cached
+        self.assertEqual(len(self.user_queries(SHOW_THEME_URL)), 1)
+        self.assertEqual(self.user_queries(SHOW_THEME_URL), [])
+
+    def test_is_staff_claim_is_trusted(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.authenticate()
+
+        res = self.client.post(SHOW_THEME_URL, {"name": "Galaxies"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_changed_user_is_loaded_and_cached(self):
+        self.authenticate()
+        self.client.patch(USER_MANAGE_URL, {"email": "another@email.test"})
+
+        self.assertEqual(len(self.user_queries(SHOW_THEME_URL)), 1)
+        self.assertEqual(self.user_queries(SHOW_THEME_URL), [])
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected_after_cache_eviction(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        caches[USERS_CACHE].clear()
+
+        res = self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate()
+        self.user.delete()
+        caches[USERS_CACHE].clear()
+
+        res = self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PerProcessUsersCacheAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="testpassword",
+        )
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@test.test", "password": "testpassword"}
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+
+    def test_request_user_is_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(SHOW_THEME_URL)
+
+        table = get_user_model()._meta.db_table
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            len([query for query in queries if f'"{table}"' in query["sql"]]),
+            1,
+        )
+
+    def test_deactivated_user_is_rejected(self):
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+
+        res = self.client.get(SHOW_THEME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,7 +1,9 @@
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from user.authentication import UserClaimsJWTAuthentication
 from user.serializers import UserSerializer
 
 
@@ -12,8 +14,9 @@ class CreateUserView(generics.CreateAPIView):
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (UserClaimsJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # Request users may be built from token claims, edit the whole row
+        return get_object_or_404(get_user_model(), pk=self.request.user.pk)